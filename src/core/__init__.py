@@ -11,6 +11,11 @@ from .config import (
     HASHTAGS, 
     HOLIDAYS, 
     IMAGE_SETTINGS,
+    DATA_PATH,
+    IMAGES_PATH,
+    LOGS_PATH,
+    IMAGE_API_KWARGS,
+    FALLBACK_IMAGE_API_KWARGS,
     MAX_DAILY_POSTS,
     SIMILARITY_THRESHOLD,
     FALLBACK_POSTS,
@@ -30,6 +35,11 @@ __all__ = [
     "HASHTAGS",
     "HOLIDAYS",
     "IMAGE_SETTINGS",
+    "DATA_PATH",
+    "IMAGES_PATH",
+    "LOGS_PATH",
+    "IMAGE_API_KWARGS",
+    "FALLBACK_IMAGE_API_KWARGS",
     "MAX_DAILY_POSTS",
     "SIMILARITY_THRESHOLD",
     "FALLBACK_POSTS",
@@ -5,25 +5,26 @@ Main agent class that orchestrates post generation, image creation, and social m
 
 import os
 import json
-import sys
-from datetime import datetime
-from typing import Dict, Any
+import asyncio
+import time
+import shutil
+import hashlib
+import tempfile
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date
+from functools import lru_cache, cached_property
+from typing import Dict, Any, Optional
+from urllib.parse import urlparse
 from openai import OpenAI
-from .utils import load_environment
-
-# Configure console for Unicode support on Windows
-if sys.platform == 'win32':
-    if hasattr(sys.stdout, 'reconfigure'):
-        sys.stdout.reconfigure(encoding='utf-8')
-    if hasattr(sys.stderr, 'reconfigure'):
-        sys.stderr.reconfigure(encoding='utf-8')
+from .utils import load_environment, get_http_session, get_openai_client, resolve_image_path
 
 # Import our new modular components
-from .config import COMPANY_CONFIG, MAX_DAILY_POSTS
+from .config import COMPANY_CONFIG, MAX_DAILY_POSTS, IMAGES_PATH
 from ..services.holiday_manager import HolidayManager
 from ..services.post_manager import PostManager
-from ..services.post_generator import PostGenerator
-from ..services.image_generator import ImageGenerator
+from ..services.post_generator import PostGenerator, get_post_generator
+from ..services.image_generator import ImageGenerator, get_image_generator
 
 # Import autonomous social media poster
 try:
@@ -33,6 +34,36 @@ except ImportError:
     SOCIAL_MEDIA_AVAILABLE = False
     print("Social media poster not available - posts will be generated but not posted")
 
+LOG = logging.getLogger(__name__)
+
+# Characters that are unsafe in image filenames derived from blog titles
+_SLUG_TRANS = str.maketrans({c: "_" for c in ' /\\:?*"<>|'})
+
+
+# Downloaded blog images unused for this long are pruned from the cache
+_IMAGE_CACHE_MAX_AGE = 30 * 24 * 60 * 60
+
+
+def _link_or_copy(src: str, dst: str):
+    """Hard-link src to dst (copying when linking is unsupported), replacing dst."""
+    tmp = f"{dst}.tmp"
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copy2(src, tmp)
+    os.replace(tmp, dst)
+
+
+@lru_cache(maxsize=400)
+def _holiday_for_date(iso_date: str) -> Optional[Dict[str, Any]]:
+    """Resolve the holiday (if any) for a YYYY-MM-DD date, memoized per date."""
+    return HolidayManager().check_if_holiday(date.fromisoformat(iso_date))
+
+
+def _holiday_for_today() -> Optional[Dict[str, Any]]:
+    """Resolve today's holiday through the per-date cache."""
+    return _holiday_for_date(date.today().isoformat())
+
 
 class AutonomousSocialMediaAgent:
     """Main autonomous social media agent that orchestrates all functionality."""
@@ -41,35 +72,109 @@ class AutonomousSocialMediaAgent:
         # Load environment using shared utility
         load_environment()
         
-        # Initialize OpenAI client
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        
-        # Initialize autonomous social media poster
-        self.social_media_poster = None
-        if SOCIAL_MEDIA_AVAILABLE:
-            try:
-                self.social_media_poster = AutonomousSocialMediaPoster()
-                if self.social_media_poster.facebook_enabled:
-                    print("Autonomous Facebook posting enabled")
-                else:
-                    print("Facebook credentials not configured - posting disabled")
-            except Exception as e:
-                print(f"Social media poster initialization failed: {e}")
-                self.social_media_poster = None
+        # OpenAI client, social media poster and services are created on first use
         
-        # Initialize modular components
-        self.holiday_manager = HolidayManager()
-        self.post_manager = PostManager()
-        self.post_generator = PostGenerator(self.client)
-        self.image_generator = ImageGenerator(self.client)
+        # Resolve and create the images directory once
+        self._images_dir = IMAGES_PATH
+        self._image_cache_dir = IMAGES_PATH / 'cache'
+        self._image_cache_dir.mkdir(parents=True, exist_ok=True)
         
         # Daily post tracking
         self.daily_posts_generated = 0
         self.max_daily_posts = MAX_DAILY_POSTS
     
-    def generate_post_with_image(self) -> Dict[str, Any]:
+    @cached_property
+    def client(self) -> OpenAI:
+        """Process-wide OpenAI client over a shared HTTP/2 connection pool."""
+        return get_openai_client()
+    
+    @cached_property
+    def social_media_poster(self) -> Optional['AutonomousSocialMediaPoster']:
+        """Autonomous social media poster, or None when unavailable."""
+        if not SOCIAL_MEDIA_AVAILABLE:
+            return None
+        try:
+            poster = AutonomousSocialMediaPoster()
+            if poster.facebook_enabled:
+                print("Autonomous Facebook posting enabled")
+            else:
+                print("Facebook credentials not configured - posting disabled")
+            return poster
+        except Exception as e:
+            print(f"Social media poster initialization failed: {e}")
+            return None
+    
+    @cached_property
+    def holiday_manager(self) -> HolidayManager:
+        return HolidayManager()
+    
+    @cached_property
+    def post_manager(self) -> PostManager:
+        return PostManager()
+    
+    @cached_property
+    def post_generator(self) -> PostGenerator:
+        return get_post_generator(self.client, holiday_lookup=_holiday_for_today)
+    
+    @cached_property
+    def image_generator(self) -> ImageGenerator:
+        return get_image_generator(self.client)
+    
+    def generate_post_with_image(self, force_regenerate: bool = False) -> Dict[str, Any]:
         """Generate a post with an accompanying image."""
-        post = self.post_generator.generate_unique_post(self.post_manager, self.holiday_manager)
+        return asyncio.run(self._generate_post_with_image_async(force_regenerate))
+    
+    async def _generate_post_with_image_async(self, force_regenerate: bool = False) -> Dict[str, Any]:
+        """Generate the post and its image while Facebook posting is prepared in parallel."""
+        # Page verification does not depend on the post, so start it before text generation.
+        # It runs on its own executor so that abandoning it doesn't hold up asyncio.run()
+        prep_future = None
+        if self.social_media_poster and self.social_media_poster.facebook_enabled:
+            prep_future = asyncio.get_running_loop().run_in_executor(
+                self._prep_executor, self.social_media_poster.prepare_facebook_post
+            )
+        
+        try:
+            post = await self._generate_post_and_image(force_regenerate)
+        except BaseException:
+            # Generation's own error is the one to report; the preparation is not needed
+            if prep_future is not None:
+                prep_future.cancel()
+            raise
+        finally:
+            # The async clients are bound to this asyncio.run() loop, so close them before it ends
+            if 'image_generator' in self.__dict__:
+                await self.image_generator.aclose_async_clients()
+        
+        if prep_future is not None:
+            # Nothing is posted without a post, or for a reused post that was already published
+            if post is None or (post.get('reused') and post.get('posted')):
+                prep_future.cancel()
+            else:
+                # A failed check is repeated when posting, so it must not lose the generated post
+                result, = await asyncio.gather(prep_future, return_exceptions=True)
+                if isinstance(result, Exception):
+                    LOG.warning("Facebook page check ahead of posting failed: %s", result)
+        return post
+    
+    @cached_property
+    def _prep_executor(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix='facebook-prep')
+    
+    async def _generate_post_and_image(self, force_regenerate: bool) -> Optional[Dict[str, Any]]:
+        """Generate the post, then download or generate its image."""
+        post = await asyncio.to_thread(
+            self.post_generator.generate_unique_post, self.post_manager, self.holiday_manager,
+            force_regenerate
+        )
+        
+        if post is None:
+            return None
+        
+        # A reused post keeps the image generated for it earlier in the day
+        # Generated images are stored as generated_images/<name>, so resolve before checking
+        if post.get('reused') and post.get('image_filename') and os.path.exists(resolve_image_path(post['image_filename'])):
+            return post
         
         # Check if it's a holiday post
         holiday_info = None
@@ -80,39 +185,85 @@ class AutonomousSocialMediaAgent:
                 'key': post.get('holiday_key', '')
             }
         
-        # If it's a blog promotion post, download the image from image_url
+        # If it's a blog promotion post, download the image from image_url,
+        # otherwise generate image based on post content
         if post.get('type') == 'blog_promotion' and post.get('image_url'):
-            import requests
-            import os
-            from urllib.parse import urlparse
-            image_url = post['image_url']
-            # Download the image to the images directory
-            images_dir = os.path.join(os.getcwd(), 'data', 'images')
-            os.makedirs(images_dir, exist_ok=True)
-            # Use the blog slug or a timestamp for the filename
-            slug = post.get('blog_title', 'blog').replace(' ', '_').replace('/', '_')
-            ext = os.path.splitext(urlparse(image_url).path)[1] or '.jpg'
-            filename = f"blog_promotion_{slug}{ext}"
-            image_path = os.path.join(images_dir, filename)
+            await asyncio.to_thread(self._download_blog_image, post)
+        else:
+            await self._generate_image_async(post, holiday_info)
+        return post
+    
+    def _download_blog_image(self, post: Dict[str, Any]) -> Dict[str, Any]:
+        """Download a blog post's featured image into the images directory."""
+        image_url = post['image_url']
+        # Download the image to the images directory
+        images_dir = self._images_dir
+        # Use the blog slug or a timestamp for the filename
+        slug = post.get('blog_title', 'blog').translate(_SLUG_TRANS)
+        ext = os.path.splitext(urlparse(image_url).path)[1] or '.jpg'
+        filename = f"blog_promotion_{slug}{ext}"
+        image_path = os.path.join(images_dir, filename)
+        
+        # Reuse a previously downloaded copy of the same image URL
+        cache_key = hashlib.blake2b(image_url.encode(), digest_size=8).hexdigest()
+        cached_path = os.path.join(self._image_cache_dir, f"{cache_key}{ext}")
+        if os.path.exists(cached_path):
             try:
-                resp = requests.get(image_url)
+                _link_or_copy(cached_path, image_path)
+                os.utime(cached_path)
+                post['image_filename'] = image_path
+                post['has_image'] = True
+                return post
+            except OSError as e:
+                print(f"Error reusing cached blog image: {e}")
+        
+        try:
+            with get_http_session().get(image_url, stream=True, timeout=(3.05, 30)) as resp:
                 if resp.status_code == 200:
-                    with open(image_path, 'wb') as f:
-                        f.write(resp.content)
+                    # Stream to a temp file in chunks, then atomically move it into place
+                    tmp = tempfile.NamedTemporaryFile(dir=images_dir, delete=False)
+                    try:
+                        for chunk in resp.iter_content(chunk_size=64 * 1024):
+                            tmp.write(chunk)
+                        tmp.flush()
+                        os.fsync(tmp.fileno())
+                        tmp.close()
+                        os.replace(tmp.name, image_path)
+                    except Exception:
+                        tmp.close()
+                        os.unlink(tmp.name)
+                        raise
+                    self._cache_blog_image(image_path, cached_path)
                     post['image_filename'] = image_path
                     post['has_image'] = True
                 else:
                     print(f"Failed to download blog image: {image_url}")
                     post['image_filename'] = None
                     post['has_image'] = False
-            except Exception as e:
-                print(f"Error downloading blog image: {e}")
-                post['image_filename'] = None
-                post['has_image'] = False
-            return post
-        
-        # Otherwise, generate image based on post content
-        image_filename = self.image_generator.generate_image(post['content'], post['type'], holiday_info)
+        except Exception as e:
+            print(f"Error downloading blog image: {e}")
+            post['image_filename'] = None
+            post['has_image'] = False
+        return post
+    
+    def _cache_blog_image(self, image_path: str, cached_path: str):
+        """Store a downloaded blog image in the cache and prune stale entries."""
+        try:
+            _link_or_copy(image_path, cached_path)
+            cutoff = time.time() - _IMAGE_CACHE_MAX_AGE
+            with os.scandir(self._image_cache_dir) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.stat().st_mtime < cutoff:
+                        os.unlink(entry.path)
+        except OSError as e:
+            print(f"Error caching blog image: {e}")
+    
+    async def _generate_image_async(self, post: Dict[str, Any], holiday_info: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Generate an image for the post content and attach it to the post."""
+        # Holiday posts are freshly written for the day, so a cached image never matches
+        image_filename = await self.image_generator.generate_image_async(
+            post['content'], post['type'], holiday_info, skip_cache=post['type'] == 'holiday'
+        )
         
         # Add image info to post
         post['image_filename'] = image_filename
@@ -130,10 +281,10 @@ class AutonomousSocialMediaAgent:
             }
         
         try:
-            print(f"Automatically posting to Facebook...")
-            print(f"Content: {post.get('content', '')[:100]}...")
+            LOG.info("Automatically posting to Facebook...")
+            LOG.info("Content: %s...", post.get('content', '')[:100])
             if post.get('image_filename'):
-                print(f"Image: {post.get('image_filename')}")
+                LOG.info("Image: %s", post.get('image_filename'))
             
             # Use the autonomous poster to post to Facebook only
             results = self.social_media_poster.post_autonomously(post)
@@ -141,7 +292,7 @@ class AutonomousSocialMediaAgent:
             return results
             
         except Exception as e:
-            print(f"Error in autonomous posting: {e}")
+            LOG.error("Error in autonomous posting: %s", e)
             return {
                 'success': False,
                 'error': str(e),
@@ -150,65 +301,88 @@ class AutonomousSocialMediaAgent:
     
     def daily_post(self):
         """Generate one content piece for the day (cron-friendly)."""
-        print(f"\n=== Generating daily post for {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ===")
+        now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        LOG.info("=== Generating daily post for %s ===", now_str)
         
+        # Only a failure to generate the post falls back to a canned post
         try:
             post = self.generate_post_with_image()
-            
-            if post is None:
-                print("No post generated for today")
-                return
-            
-            # Display the generated post
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            print(f"[{timestamp}] Generated post:")
-            print(f"Type: {post['type']}")
+        except Exception as e:
+            LOG.error("Error generating daily post: %s", e)
+            # Generate fallback post
+            fallback_post = self.post_generator.generate_fallback_post()
+            return fallback_post
+        
+        if post is None:
+            LOG.info("No post generated for today")
+            return
+        
+        # Display the generated post
+        if LOG.isEnabledFor(logging.INFO):
+            LOG.info("[%s] Generated post:", now_str)
+            LOG.info("Type: %s", post['type'])
             if post.get('type') == 'holiday':
-                print(f"Holiday: {post.get('holiday_name', 'Unknown')}")
-                print(f"Holiday Type: {post.get('holiday_type', 'Unknown')}")
-            print(f"Content: {post['content']}")
-            print(f"Hashtags: {' '.join(post['hashtags'])}")
+                LOG.info("Holiday: %s", post.get('holiday_name', 'Unknown'))
+                LOG.info("Holiday Type: %s", post.get('holiday_type', 'Unknown'))
+            LOG.info("Content: %s", post['content'])
+            LOG.info("Hashtags: %s", ' '.join(post['hashtags']))
             if post.get('has_image'):
-                print(f"Image: {post.get('image_filename', 'Generated')}")
+                LOG.info("Image: %s", post.get('image_filename', 'Generated'))
             else:
-                print("No image generated")
-            print("-" * 50)
-            
-            # Automatically post to Facebook
-            if self.social_media_poster:
-                print("Autonomous Facebook posting initiated...")
+                LOG.info("No image generated")
+            LOG.info("-" * 50)
+        
+        # A reused post is only posted again if the earlier run today failed to publish it
+        if post.get('reused') and (post.get('posted') or not self.social_media_poster):
+            LOG.info("Reused today's existing post - not posting again or re-saving")
+            return post
+        
+        # The saved record says whether this post was published, so a rerun can retry it
+        post['posted'] = False
+        post.pop('posting_error', None)
+        
+        # Automatically post to Facebook; failures keep the generated post
+        if self.social_media_poster:
+            try:
+                LOG.info("Autonomous Facebook posting initiated...")
                 posting_results = self.post_autonomously(post)
+                post['posted'] = bool(posting_results.get('overall_success'))
                 
-                if posting_results.get('overall_success'):
-                    print("Successfully posted to Facebook!")
+                if post['posted']:
+                    LOG.info("Successfully posted to Facebook!")
                     for platform, result in posting_results.get('platforms', {}).items():
                         if result.get('success'):
-                            print(f"  {platform}: Posted successfully")
+                            LOG.info("  %s: Posted successfully", platform)
                         else:
-                            print(f"  {platform}: {result.get('error', 'Unknown error')}")
+                            LOG.info("  %s: %s", platform, result.get('error', 'Unknown error'))
                 else:
-                    print("Facebook posting failed:")
+                    LOG.warning("Facebook posting failed:")
                     for platform, result in posting_results.get('platforms', {}).items():
                         if not result.get('success'):
-                            print(f"  {platform}: {result.get('error', 'Unknown error')}")
-            else:
-                print("Facebook posting not configured - content generated but not posted")
-            
-            # Save current post to daily file
+                            LOG.warning("  %s: %s", platform, result.get('error', 'Unknown error'))
+            except Exception as e:
+                LOG.error("Error posting daily post: %s", e)
+                post['posting_error'] = str(e)
+        else:
+            LOG.info("Facebook posting not configured - content generated but not posted")
+        
+        # Save current post to daily file
+        try:
             daily_filename = self.post_manager.save_daily_post(post)
-            
-            print(f"Daily post generated and saved successfully!")
-            print(f"Saved to: {daily_filename}")
-            return post
-            
+            self.post_manager.flush()
         except Exception as e:
-            print(f"Error generating daily post: {e}")
-            # Generate fallback post
-            fallback_post = self.post_generator.generate_fallback_post()
-            return fallback_post
+            LOG.error("Error saving daily post: %s", e)
+            return post
+        
+        LOG.info("Daily post generated and saved successfully!")
+        LOG.info("Saved to: %s", daily_filename)
+        return post
 
     def run_daily_cron(self):
         """Run the agent for cron - generates one post and exits."""
+        # No-op when the social media poster has already configured logging
+        logging.basicConfig(level=logging.INFO, format='%(message)s')
+        
         print("Fishtown Web Design Daily Content Generator")
         print("=" * 50)
         print("Generating one daily post...")
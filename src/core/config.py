@@ -3,6 +3,9 @@ Configuration module for the Autonomous Social Media Agent.
 Contains company configuration, post categories, hashtags, and holiday definitions.
 """
 
+from pathlib import Path
+from types import MappingProxyType
+
 # Company configuration
 COMPANY_CONFIG = {
     "name": "Fishtown Web Design",
@@ -20,12 +23,20 @@ COMPANY_CONFIG = {
     "content_guidelines": "IMPORTANT: Do not mention having a local office, physical workspace, or in-person meetings. We are a fully remote company serving the Philadelphia area. Focus on digital services, online collaboration, and virtual support for local businesses."
 }
 
-# Data directory configuration
-DATA_DIRECTORY = "data/posts"
-IMAGES_DIRECTORY = "data/images"
+# Absolute data paths, resolved once relative to the project root so the
+# agent reads and writes the same files whatever the working directory
+_ROOT = Path(__file__).resolve().parent.parent.parent
+DATA_PATH = _ROOT / "data" / "posts"
+IMAGES_PATH = _ROOT / "data" / "images"
+LOGS_PATH = _ROOT / "data" / "logs"
+
+# Data directory configuration (string forms of the paths above, for os.path use)
+DATA_DIRECTORY = str(DATA_PATH)
+IMAGES_DIRECTORY = str(IMAGES_PATH)
 
 # Post type configurations - Easy to add new types here
 # The system automatically uses all keys in this dictionary as post types
+# Optional "image_quality"/"image_size" keys override IMAGE_SETTINGS for that type
 POST_TYPE_CONFIGS = {
     "web_design_tip": {
         "description": "Share a practical web design tip that small businesses can implement immediately. Make it actionable and valuable.",
@@ -85,18 +96,18 @@ POST_TYPE_CONFIGS = {
 }
 
 # Post categories - automatically generated from POST_TYPE_CONFIGS keys
-POST_CATEGORIES = list(POST_TYPE_CONFIGS.keys())
+POST_CATEGORIES = tuple(POST_TYPE_CONFIGS.keys())
 
 # Hashtags
-HASHTAGS = [
+HASHTAGS = (
     "#FishtownWebDesign", "#PhillyWebDesign", "#WebDesign", "#DigitalMarketing",
     "#Philadelphia", "#SmallBusiness", "#WebDevelopment", "#UXDesign",
     "#LocalBusiness", "#Fishtown", "#PhillyBusiness", "#WebsiteDesign",
     "#DigitalAgency", "#Branding", "#SEO"
-]
+)
 
 # Holiday definitions - Major US Holidays Only
-HOLIDAYS = {
+HOLIDAYS = MappingProxyType({
     "new_years_day": {"date": "01-01", "name": "New Year's Day", "type": "major"},
     "martin_luther_king_day": {"date": "01-15", "name": "Martin Luther King Jr. Day", "type": "major", "weekday": "monday"},
     "presidents_day": {"date": "02-19", "name": "Presidents' Day", "type": "major", "weekday": "monday"},
@@ -107,17 +118,17 @@ HOLIDAYS = {
     "veterans_day": {"date": "11-11", "name": "Veterans Day", "type": "major"},
     "thanksgiving": {"date": "11-28", "name": "Thanksgiving", "type": "major", "weekday": "thursday"},
     "christmas": {"date": "12-25", "name": "Christmas", "type": "major"},
-}
+})
 
 # Fallback posts for when API fails
-FALLBACK_POSTS = [
+FALLBACK_POSTS = (
     "💡 Quick web design tip: Make sure your website loads in under 3 seconds! Speed matters for both user experience and SEO. Need help optimizing your site? We're here to help! 🚀",
     "🌟 Client Spotlight: We recently helped a local Fishtown restaurant create a stunning website that increased their online orders by 40%! Great food + great website = happy customers! 🍕",
     "📊 Did you know? 57% of users won't recommend a business with a poorly designed mobile website. Mobile-first design isn't just a trend—it's essential! 📱",
     "🏘️ Love our Fishtown community! Supporting local businesses is what we're all about. What's your favorite local spot in the neighborhood? Share below! 👇",
     "🚀 The future of web design is here! AI-powered tools are revolutionizing how we create websites. But remember, human creativity and strategy still drive the best results! 🤖",
     "💼 Business tip: Your website is often the first impression potential customers have of your business. Make it count! Professional design builds trust and credibility. 🎯"
-]
+)
 
 # Image generation settings
 IMAGE_SETTINGS = {
@@ -125,9 +136,18 @@ IMAGE_SETTINGS = {
     "quality": "hd",
     "style": "vivid",
     "max_tokens": 500,
-    "temperature": 0.7
+    "temperature": 0.7,
+    "verify_downloads": False  # Check saved images are PNGs before using them
 }
 
+# Exact keyword arguments passed to the OpenAI images API
+IMAGE_API_KWARGS = MappingProxyType({k: IMAGE_SETTINGS[k] for k in ("size", "quality", "style")})
+
+# Images for post types without a configuration (e.g. fallback posts) are generated at
+# "standard" quality: roughly twice as fast as "hd", and Facebook/Instagram downscale
+# to about 1080px anyway, so the extra detail is not visible once posted
+FALLBACK_IMAGE_API_KWARGS = MappingProxyType({**IMAGE_API_KWARGS, "quality": "standard", "size": "1024x1024"})
+
 # Content similarity threshold
 SIMILARITY_THRESHOLD = 0.3
 
@@ -5,14 +5,53 @@ Shared utilities for Fishtown Web Design Social Media Automation
 
 import os
 import sys
+import json
+from functools import lru_cache
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
+from .config import IMAGES_DIRECTORY
 
-# Configure console for Unicode support on Windows
-if sys.platform == 'win32':
+if TYPE_CHECKING:
+    import requests
+
+# orjson parses JSON several times faster when installed; stdlib json otherwise
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_UTF8_DONE = False
+
+def _ensure_utf8_console():
+    """Configure console for Unicode support on Windows (once per process)."""
+    global _UTF8_DONE
+    if _UTF8_DONE or sys.platform != 'win32':
+        return
     if hasattr(sys.stdout, 'reconfigure'):
         sys.stdout.reconfigure(encoding='utf-8')
     if hasattr(sys.stderr, 'reconfigure'):
         sys.stderr.reconfigure(encoding='utf-8')
+    _UTF8_DONE = True
+
+def json_loads(data):
+    """Parse JSON from str or bytes, using orjson when it is available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def json_dumpb(obj) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes, straight from orjson when it is available."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def json_dumps(obj, pretty: bool = False) -> str:
+    """Serialize to JSON (compact, or 2-space indented if pretty), using orjson when it is available."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0).decode()
+    if pretty:
+        return json.dumps(obj, indent=2)
+    return json.dumps(obj, separators=(',', ':'))
 
 def load_environment():
     """Load environment variables from .env file in config folder."""
@@ -60,8 +99,22 @@ def check_env_file():
     
     return True
 
-def check_social_media_credentials():
-    """Check if social media credentials are configured."""
+@lru_cache(maxsize=4096)
+def resolve_image_path(image_path: str) -> str:
+    """Resolve image path to the correct directory."""
+    if not image_path:
+        return image_path
+    
+    # If the path starts with generated_images/, look in the IMAGES_DIRECTORY
+    if image_path.startswith('generated_images/'):
+        filename = os.path.basename(image_path)
+        return os.path.join(IMAGES_DIRECTORY, filename)
+    
+    return image_path
+
+@lru_cache(maxsize=1)
+def _credentials():
+    """Load social media credentials once and memoize them."""
     load_environment()
     
     facebook_token = os.getenv("FACEBOOK_ACCESS_TOKEN")
@@ -79,6 +132,39 @@ def check_social_media_credentials():
         'instagram_id': instagram_id
     }
 
+def check_social_media_credentials():
+    """Check if social media credentials are configured."""
+    return dict(_credentials())
+
+@lru_cache(maxsize=1)
+def get_http_session() -> 'requests.Session':
+    """Get the shared, connection-pooled HTTP session."""
+    # requests pulls in urllib3, idna and certifi, so it is imported on first use
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=20,
+        pool_maxsize=20,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+    )
+    # Plain http too, so the local Strapi API gets the same pooling and retries
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+@lru_cache(maxsize=1)
+def get_openai_client():
+    """Get the shared OpenAI client; one per process so its HTTP/2 pool stays warm."""
+    import httpx
+    from openai import OpenAI
+    http_client = httpx.Client(
+        http2=True,
+        limits=httpx.Limits(max_connections=10, max_keepalive_connections=10)
+    )
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=http_client)
+
 def validate_setup():
     """Validate the complete setup including dependencies and environment."""
     print("Validating setup...")
@@ -98,4 +184,6 @@ def validate_setup():
     print(f"Facebook: {'Enabled' if credentials['facebook_enabled'] else 'Disabled'}")
     print(f"Instagram: {'Enabled' if credentials['instagram_enabled'] else 'Disabled'}")
     
-    return True 
\ No newline at end of file
+    return True
+
+_ensure_utf8_console()
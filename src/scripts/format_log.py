@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Pretty-print the posting log.
+The log is stored as compact JSON lines; this formats entries for reading on demand,
+including older entries from rotated, compressed segments.
+
+Usage (from the repository root): python -m src.scripts.format_log [--last N] [path]
+"""
+
+import os
+import sys
+import json
+from src.core.config import DATA_DIRECTORY
+from src.services.social_media_poster import POSTING_LOG_FILENAME, read_posting_log
+
+
+def main():
+    """Print posting log entries as indented JSON."""
+    args = sys.argv[1:]
+    last = None
+    if len(args) >= 2 and args[0] == '--last':
+        last = int(args[1])
+        args = args[2:]
+    path = args[0] if args else os.path.join(DATA_DIRECTORY, POSTING_LOG_FILENAME)
+
+    entries = read_posting_log(path, include_archived=True)
+    if not entries:
+        print(f"❌ No posting log entries found at {path}")
+        return 1
+
+    if last is not None:
+        entries = entries[-last:] if last > 0 else []
+    for entry in entries:
+        print(json.dumps(entry, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,11 +6,70 @@ Useful for testing image generation, file saving, and content creation.
 """
 
 import sys
-import traceback
+import heapq
 from datetime import datetime
 from src.core.agent import AutonomousSocialMediaAgent
 
 
+def _list_by_ext(dirpath, ext):
+    """List names of regular files in dirpath with the given extension(s), or None if it is missing."""
+    import os
+    try:
+        with os.scandir(dirpath) as entries:
+            return [e.name for e in entries if e.name.endswith(ext) and e.is_file()]
+    except FileNotFoundError:
+        return None
+
+
+def _collect_state(root):
+    """Collect the files checked after a test run in one sweep of the project root.
+    
+    Missing directories map to None.
+    """
+    import os
+    state = {'data/posts': None, 'data/images': None, '.': [], 'generated_images': None}
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith('.json'):
+                state['.'].append(entry.name)
+            elif entry.name == 'generated_images' and entry.is_dir():
+                state['generated_images'] = _list_by_ext(entry.path, '.png')
+            elif entry.name == 'data' and entry.is_dir():
+                with os.scandir(entry.path) as data_entries:
+                    for data_entry in data_entries:
+                        if data_entry.name == 'posts' and data_entry.is_dir():
+                            state['data/posts'] = _list_by_ext(data_entry.path, ('.json', '.jsonl'))
+                        elif data_entry.name == 'images' and data_entry.is_dir():
+                            state['data/images'] = _list_by_ext(data_entry.path, '.png')
+    return state
+
+
+def test_posting_log_rotation():
+    """Check that entries in a rotated, compressed posting-log segment read back."""
+    import os
+    import tempfile
+    from src.services.social_media_poster import read_posting_log, _compress_log_segment
+    
+    print("🧪 Testing posting log rotation")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_path = os.path.join(tmpdir, 'posting_log.jsonl')
+        segment = os.path.join(tmpdir, 'posting_log.20240101_000000_000000.jsonl')
+        with open(segment, 'w') as f:
+            f.write('{"post_id": "rotated"}\n')
+        with open(log_path, 'w') as f:
+            f.write('{"post_id": "current"}\n')
+        _compress_log_segment(segment)
+        
+        compressed = [name for name in os.listdir(tmpdir) if name.endswith(('.zst', '.gz'))]
+        ids = [entry.get('post_id') for entry in read_posting_log(log_path, include_archived=True)]
+    
+    if len(compressed) != 1 or ids != ['rotated', 'current']:
+        print(f"❌ Rotated segment did not read back: {compressed} -> {ids}")
+        return False
+    print(f"✅ Rotated segment {compressed[0]} read back")
+    return True
+
+
 def test_agent_without_posting():
     """Test the agent without posting to social media."""
     try:
@@ -35,7 +94,7 @@ def test_agent_without_posting():
         
         # Generate a post with image
         print("🎯 Generating post with image...")
-        post = agent.generate_post_with_image()
+        post = agent.generate_post_with_image(force_regenerate=True)
         
         if post is None:
             print("❌ No post generated")
@@ -81,11 +140,13 @@ def test_agent_without_posting():
         # Check if files are in correct directories
         print("\n📁 Checking file locations...")
         
+        # Sweep the project tree once for every location checked below
+        state = _collect_state('.')
+        
         # Check data/posts directory
-        import os
         data_posts_dir = "data/posts"
-        if os.path.exists(data_posts_dir):
-            json_files = [f for f in os.listdir(data_posts_dir) if f.endswith('.json')]
+        json_files = state[data_posts_dir]
+        if json_files is not None:
             print(f"✅ Found {len(json_files)} JSON files in {data_posts_dir}")
             for file in json_files:
                 print(f"   📄 {file}")
@@ -94,11 +155,11 @@ def test_agent_without_posting():
         
         # Check data/images directory
         data_images_dir = "data/images"
-        if os.path.exists(data_images_dir):
-            image_files = [f for f in os.listdir(data_images_dir) if f.endswith('.png')]
+        image_files = state[data_images_dir]
+        if image_files is not None:
             print(f"✅ Found {len(image_files)} image files in {data_images_dir}")
             # Show the most recent images
-            recent_images = sorted(image_files)[-5:] if len(image_files) > 5 else image_files
+            recent_images = heapq.nlargest(5, image_files) if len(image_files) > 5 else image_files
             for file in recent_images:
                 print(f"   🖼️  {file}")
         else:
@@ -108,7 +169,7 @@ def test_agent_without_posting():
         print("\n🔍 Checking for files in wrong locations...")
         
         # Check root directory for JSON files
-        root_json_files = [f for f in os.listdir('.') if f.endswith('.json')]
+        root_json_files = state['.']
         if root_json_files:
             print(f"❌ Found {len(root_json_files)} JSON files in root directory:")
             for file in root_json_files:
@@ -117,8 +178,8 @@ def test_agent_without_posting():
             print("✅ No JSON files in root directory")
         
         # Check generated_images directory
-        if os.path.exists("generated_images"):
-            generated_images = [f for f in os.listdir("generated_images") if f.endswith('.png')]
+        generated_images = state['generated_images']
+        if generated_images is not None:
             if generated_images:
                 print(f"⚠️  Found {len(generated_images)} images in generated_images/ (should be in data/images/):")
                 for file in generated_images:
@@ -140,6 +201,7 @@ def test_agent_without_posting():
         
     except Exception as e:
         print(f"❌ Test failed with error: {e}")
+        import traceback
         traceback.print_exc()
         return False
 
@@ -147,11 +209,14 @@ def test_agent_without_posting():
 def main():
     """Main function to run the test."""
     try:
+        if not test_posting_log_rotation():
+            return 1
         success = test_agent_without_posting()
         return 0 if success else 1
         
     except Exception as e:
         print(f"❌ Fatal error: {e}")
+        import traceback
         traceback.print_exc()
         return 1
 
@@ -5,8 +5,8 @@ Contains all the service modules for content generation, posting, and management
 
 from .holiday_manager import HolidayManager
 from .post_manager import PostManager
-from .post_generator import PostGenerator
-from .image_generator import ImageGenerator
+from .post_generator import PostGenerator, get_post_generator
+from .image_generator import ImageGenerator, get_image_generator
 from .social_media_poster import AutonomousSocialMediaPoster
 
 __all__ = [
@@ -14,5 +14,7 @@ __all__ = [
     "PostManager", 
     "PostGenerator",
     "ImageGenerator",
+    "get_post_generator",
+    "get_image_generator",
     "AutonomousSocialMediaPoster"
 ] 
\ No newline at end of file
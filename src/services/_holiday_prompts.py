@@ -0,0 +1,54 @@
+"""
+Holiday image prompt templates shared by HolidayManager and ImageGenerator.
+"""
+
+import sys
+from functools import lru_cache
+from typing import Optional
+
+# Quality suffix shared by every generated image prompt
+QUALITY_SETTINGS = "high quality, professional photography, clean composition, no text, no words, no letters, minimalist design"
+
+# Holiday image prompt templates keyed by holiday key (None = generic celebration)
+_HOLIDAY_IMAGE_TEMPLATES = {
+    "independence_day": "Professional photograph of American flag with modern web design elements subtly integrated. Clean, patriotic composition with red, white, and blue color scheme. {quality}. Perfect for social media.",
+    "christmas": "Professional photograph of festive holiday decorations with modern web design elements subtly integrated. Clean, warm composition with holiday colors. {quality}. Perfect for social media.",
+    "thanksgiving": "Professional photograph of warm, welcoming Thanksgiving elements with modern web design concepts subtly integrated. Clean, cozy composition with autumn colors. {quality}. Perfect for social media.",
+    None: "Professional photograph of celebration elements with modern web design concepts subtly integrated. Clean, festive composition. {quality}. Perfect for social media."
+}
+
+# Holiday image prompts with the default quality settings, formatted once at import
+_HOLIDAY_IMAGE_PROMPTS = {
+    key: template.format(quality=QUALITY_SETTINGS)
+    for key, template in _HOLIDAY_IMAGE_TEMPLATES.items()
+}
+
+# Holiday name keywords -> template key, for holiday info that carries only a name
+_HOLIDAY_NAME_KEYWORDS = {
+    sys.intern(keyword): key for keyword, key in (
+        ("independence", "independence_day"),
+        ("july", "independence_day"),
+        ("christmas", "christmas"),
+        ("thanksgiving", "thanksgiving"),
+    )
+}
+
+
+@lru_cache(maxsize=64)
+def holiday_key_for_name(holiday_name: str) -> Optional[str]:
+    """Map a holiday name to its image template key, or None for the generic template."""
+    name_lower = holiday_name.lower()
+    tokens = set(name_lower.split())
+    for keyword, key in _HOLIDAY_NAME_KEYWORDS.items():
+        if keyword in tokens or keyword in name_lower:
+            return key
+    return None
+
+
+@lru_cache(maxsize=64)
+def build_holiday_image_prompt(key: str, qs: str = QUALITY_SETTINGS) -> str:
+    """Build the image prompt for a holiday key with the given quality settings."""
+    if qs == QUALITY_SETTINGS:
+        return _HOLIDAY_IMAGE_PROMPTS.get(key, _HOLIDAY_IMAGE_PROMPTS[None])
+    template = _HOLIDAY_IMAGE_TEMPLATES.get(key, _HOLIDAY_IMAGE_TEMPLATES[None])
+    return template.format(quality=qs)
@@ -4,10 +4,107 @@ Handles holiday detection, weekday calculations, and holiday-specific content.
 """
 
 from datetime import date, timedelta
-from typing import Dict, Any, List
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
 import random
+from ._holiday_prompts import build_holiday_image_prompt, holiday_key_for_name
 from ..core.config import HOLIDAYS, HASHTAGS
 
+_WEEKDAY_NUM = {"monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3,
+                "friday": 4, "saturday": 5, "sunday": 6}
+
+# (holiday_key, month) -> which occurrence of the holiday's weekday it falls on (-1 = last)
+_WEEKDAY_RULES = {
+    ("martin_luther_king_day", 1): 3,   # Third Monday of January
+    ("presidents_day", 2): 3,           # Third Monday of February
+    ("memorial_day", 5): -1,            # Last Monday of May
+    ("labor_day", 9): 1,                # First Monday of September
+    ("columbus_day", 10): 2,            # Second Monday of October
+    ("thanksgiving", 11): 4,            # Fourth Thursday of November
+}
+
+# Fixed-date holidays indexed by (month, day); weekday-based ones are checked separately
+_FIXED_BY_MD = {}
+for _key, _info in HOLIDAYS.items():
+    if "weekday" not in _info:
+        _month, _day = map(int, _info["date"].split("-"))
+        _FIXED_BY_MD[(_month, _day)] = (_key, _info)
+
+# Weekday-based holidays grouped by month, so a date only tests the rules for its own month
+_WEEKDAY_HOLIDAYS_BY_MONTH = {}
+for _key, _info in HOLIDAYS.items():
+    if "weekday" in _info:
+        for (_rule_key, _month), _nth in _WEEKDAY_RULES.items():
+            if _rule_key == _key:
+                _WEEKDAY_HOLIDAYS_BY_MONTH.setdefault(_month, []).append(
+                    (_key, _info, _WEEKDAY_NUM[_info["weekday"]], _nth))
+
+
+def _nth_weekday_of_month(check_date: date, weekday_num: int, nth: int) -> bool:
+    """Check if the date is the nth occurrence (-1 for last) of the weekday in the month."""
+    if check_date.weekday() != weekday_num:
+        return False
+    if nth == -1:
+        return (check_date + timedelta(days=7)).month != check_date.month
+    return (check_date.day - 1) // 7 + 1 == nth
+
+
+@lru_cache(maxsize=366)
+def _holiday_for_date(check_date: date) -> Optional[Dict[str, Any]]:
+    """Resolve the holiday for a date; memoized since the answer never changes."""
+    current_month = check_date.month
+    current_day = check_date.day
+    
+    # Check for exact date matches
+    holiday = _FIXED_BY_MD.get((current_month, current_day))
+    if holiday:
+        holiday_key, holiday_info = holiday
+        return {
+            "key": holiday_key,
+            "name": holiday_info["name"],
+            "type": holiday_info["type"],
+            "date": check_date
+        }
+    
+    # Check for weekday-based holidays (like "third Monday of January")
+    for holiday_key, holiday_info, weekday_num, nth in _WEEKDAY_HOLIDAYS_BY_MONTH.get(current_month, ()):
+        if _nth_weekday_of_month(check_date, weekday_num, nth):
+            return {
+                "key": holiday_key,
+                "name": holiday_info["name"],
+                "type": holiday_info["type"],
+                "date": check_date
+            }
+    
+    return None
+
+
+# Holiday post prompt; only the holiday name varies between calls
+_HOLIDAY_PROMPT_TEMPLATE = """
+        Company: Fishtown Web Design
+        Location: Fishtown, Philadelphia
+        Services: Custom Website Design, E-commerce Development, SEO Optimization, Website Maintenance, Mobile-First Design, Brand Identity Design, Digital Marketing
+        Target Audience: Small businesses in Philadelphia, Blue collar businesses, like, plumbers, electricians, and HVAC technicians., Professional services, Startups and entrepreneurs, Non-profit organizations
+        Brand Voice: Professional yet approachable, creative, community-focused, tech-savvy but human, philly based
+        
+        Today is {holiday}. Generate a holiday-themed post that celebrates this special day while being relevant to web design and local Philadelphia businesses.
+        
+
+Celebrate {holiday} with a post that honors the significance of this national holiday while connecting it to web design and local business success."""
+
+
+@lru_cache(maxsize=64)
+def _holiday_prompt(holiday_name: str) -> str:
+    """Build the holiday post prompt for a holiday name."""
+    return _HOLIDAY_PROMPT_TEMPLATE.format(holiday=holiday_name)
+
+
+@lru_cache(maxsize=64)
+def _holiday_hashtags(holiday_name: str) -> Tuple[str, ...]:
+    """The two hashtags derived from a holiday name."""
+    compact = holiday_name.replace(' ', '')
+    return (f"#{compact.replace('-', '')}", f"#{compact}")
+
 
 class HolidayManager:
     """Manages holiday detection and holiday-specific content generation."""
@@ -15,209 +112,25 @@ class HolidayManager:
     def __init__(self):
         self.holidays = HOLIDAYS
     
-    def check_if_holiday(self, check_date: date | None = None) -> Dict[str, Any] | None:
+    def check_if_holiday(self, check_date: Optional[date] = None) -> Optional[Dict[str, Any]]:
         """Check if the given date (or today) is a holiday."""
         if check_date is None:
             check_date = date.today()
         
-        current_month = check_date.month
-        current_day = check_date.day
-        current_weekday = check_date.strftime("%A").lower()
-        
-        # Check for exact date matches
-        for holiday_key, holiday_info in self.holidays.items():
-            holiday_date = holiday_info["date"]
-            holiday_month, holiday_day = map(int, holiday_date.split("-"))
-            
-            # Check if it's an exact date match
-            if current_month == holiday_month and current_day == holiday_day:
-                return {
-                    "key": holiday_key,
-                    "name": holiday_info["name"],
-                    "type": holiday_info["type"],
-                    "date": check_date
-                }
-            
-            # Check for weekday-based holidays (like "third Monday of January")
-            if "weekday" in holiday_info:
-                required_weekday = holiday_info["weekday"]
-                if current_weekday == required_weekday:
-                    if holiday_key == "martin_luther_king_day" and current_month == 1:
-                        # MLK Day is the third Monday of January
-                        if self._is_third_weekday_of_month(check_date, "monday"):
-                            return {
-                                "key": holiday_key,
-                                "name": holiday_info["name"],
-                                "type": holiday_info["type"],
-                                "date": check_date
-                            }
-                    elif holiday_key == "presidents_day" and current_month == 2:
-                        # Presidents' Day is the third Monday of February
-                        if self._is_third_weekday_of_month(check_date, "monday"):
-                            return {
-                                "key": holiday_key,
-                                "name": holiday_info["name"],
-                                "type": holiday_info["type"],
-                                "date": check_date
-                            }
-                    elif holiday_key == "memorial_day" and current_month == 5:
-                        # Memorial Day is the last Monday of May
-                        if self._is_last_weekday_of_month(check_date, "monday"):
-                            return {
-                                "key": holiday_key,
-                                "name": holiday_info["name"],
-                                "type": holiday_info["type"],
-                                "date": check_date
-                            }
-                    elif holiday_key == "labor_day" and current_month == 9:
-                        # Labor Day is the first Monday of September
-                        if self._is_first_weekday_of_month(check_date, "monday"):
-                            return {
-                                "key": holiday_key,
-                                "name": holiday_info["name"],
-                                "type": holiday_info["type"],
-                                "date": check_date
-                            }
-                    elif holiday_key == "columbus_day" and current_month == 10:
-                        # Columbus Day is the second Monday of October
-                        if self._is_second_weekday_of_month(check_date, "monday"):
-                            return {
-                                "key": holiday_key,
-                                "name": holiday_info["name"],
-                                "type": holiday_info["type"],
-                                "date": check_date
-                            }
-                    elif holiday_key == "thanksgiving" and current_month == 11:
-                        # Thanksgiving is the fourth Thursday of November
-                        if self._is_fourth_weekday_of_month(check_date, "thursday"):
-                            return {
-                                "key": holiday_key,
-                                "name": holiday_info["name"],
-                                "type": holiday_info["type"],
-                                "date": check_date
-                            }
-        
-        return None
-    
-    def _is_third_weekday_of_month(self, check_date: date, weekday: str) -> bool:
-        """Check if the date is the third occurrence of the specified weekday in the month."""
-        weekday_num = {"monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3, 
-                      "friday": 4, "saturday": 5, "sunday": 6}[weekday]
-        
-        first_day = date(check_date.year, check_date.month, 1)
-        first_weekday = first_day.weekday()
-        
-        # Calculate the first occurrence of the target weekday
-        days_until_first = (weekday_num - first_weekday) % 7
-        first_occurrence = first_day + timedelta(days=days_until_first)
-        
-        # Third occurrence is 14 days after the first
-        third_occurrence = first_occurrence + timedelta(days=14)
-        
-        return check_date == third_occurrence
-    
-    def _is_last_weekday_of_month(self, check_date: date, weekday: str) -> bool:
-        """Check if the date is the last occurrence of the specified weekday in the month."""
-        weekday_num = {"monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3, 
-                      "friday": 4, "saturday": 5, "sunday": 6}[weekday]
-        
-        # Get the last day of the month
-        if check_date.month == 12:
-            last_day = date(check_date.year + 1, 1, 1) - timedelta(days=1)
-        else:
-            last_day = date(check_date.year, check_date.month + 1, 1) - timedelta(days=1)
-        
-        # Work backwards to find the last occurrence of the weekday
-        while last_day.weekday() != weekday_num:
-            last_day -= timedelta(days=1)
-        
-        return check_date == last_day
-    
-    def _is_first_weekday_of_month(self, check_date: date, weekday: str) -> bool:
-        """Check if the date is the first occurrence of the specified weekday in the month."""
-        weekday_num = {"monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3, 
-                      "friday": 4, "saturday": 5, "sunday": 6}[weekday]
-        
-        first_day = date(check_date.year, check_date.month, 1)
-        first_weekday = first_day.weekday()
-        
-        # Calculate the first occurrence of the target weekday
-        days_until_first = (weekday_num - first_weekday) % 7
-        first_occurrence = first_day + timedelta(days=days_until_first)
-        
-        return check_date == first_occurrence
-    
-    def _is_second_weekday_of_month(self, check_date: date, weekday: str) -> bool:
-        """Check if the date is the second occurrence of the specified weekday in the month."""
-        weekday_num = {"monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3, 
-                      "friday": 4, "saturday": 5, "sunday": 6}[weekday]
-        
-        first_day = date(check_date.year, check_date.month, 1)
-        first_weekday = first_day.weekday()
-        
-        # Calculate the first occurrence of the target weekday
-        days_until_first = (weekday_num - first_weekday) % 7
-        first_occurrence = first_day + timedelta(days=days_until_first)
-        
-        # Second occurrence is 7 days after the first
-        second_occurrence = first_occurrence + timedelta(days=7)
-        
-        return check_date == second_occurrence
-    
-    def _is_fourth_weekday_of_month(self, check_date: date, weekday: str) -> bool:
-        """Check if the date is the fourth occurrence of the specified weekday in the month."""
-        weekday_num = {"monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3, 
-                      "friday": 4, "saturday": 5, "sunday": 6}[weekday]
-        
-        first_day = date(check_date.year, check_date.month, 1)
-        first_weekday = first_day.weekday()
-        
-        # Calculate the first occurrence of the target weekday
-        days_until_first = (weekday_num - first_weekday) % 7
-        first_occurrence = first_day + timedelta(days=days_until_first)
-        
-        # Fourth occurrence is 21 days after the first
-        fourth_occurrence = first_occurrence + timedelta(days=21)
-        
-        return check_date == fourth_occurrence
+        holiday = _holiday_for_date(check_date)
+        # Hand out a copy so callers can't corrupt the cached result
+        return dict(holiday) if holiday else None
     
     def get_holiday_hashtags(self, holiday_info: Dict[str, Any]) -> List[str]:
         """Get holiday-specific hashtags."""
-        holiday_name = holiday_info['name']
-        
-        # Base holiday hashtags
-        holiday_hashtags = [f"#{holiday_name.replace(' ', '').replace('-', '')}", f"#{holiday_name.replace(' ', '')}"]
-        
-        # Major holiday hashtags
-        holiday_hashtags.extend(["#Holiday", "#Celebration", "#NationalHoliday"])
-        
-        return holiday_hashtags[:2]  # Limit to 2 holiday-specific hashtags
+        # Limited to the 2 name-based hashtags; generic ones like #Holiday are left out
+        return list(_holiday_hashtags(holiday_info['name']))
     
     def create_holiday_prompt(self, holiday_info: Dict[str, Any]) -> str:
         """Create a specific prompt for holiday posts."""
-        holiday_name = holiday_info['name']
-        
-        base_context = f"""
-        Company: Fishtown Web Design
-        Location: Fishtown, Philadelphia
-        Services: Custom Website Design, E-commerce Development, SEO Optimization, Website Maintenance, Mobile-First Design, Brand Identity Design, Digital Marketing
-        Target Audience: Small businesses in Philadelphia, Blue collar businesses, like, plumbers, electricians, and HVAC technicians., Professional services, Startups and entrepreneurs, Non-profit organizations
-        Brand Voice: Professional yet approachable, creative, community-focused, tech-savvy but human, philly based
-        
-        Today is {holiday_name}. Generate a holiday-themed post that celebrates this special day while being relevant to web design and local Philadelphia businesses.
-        """
-        
-        return base_context + f"\n\nCelebrate {holiday_name} with a post that honors the significance of this national holiday while connecting it to web design and local business success."
+        return _holiday_prompt(holiday_info['name'])
     
     def create_holiday_image_prompt(self, holiday_info: Dict[str, Any], quality_settings: str) -> str:
         """Create a specific image prompt for holiday posts."""
-        holiday_name = holiday_info['name']
-        
-        if "independence" in holiday_name.lower() or "july" in holiday_name.lower():
-            return f"Professional photograph of American flag with modern web design elements subtly integrated. Clean, patriotic composition with red, white, and blue color scheme. {quality_settings}. Perfect for social media."
-        elif "christmas" in holiday_name.lower():
-            return f"Professional photograph of festive holiday decorations with modern web design elements subtly integrated. Clean, warm composition with holiday colors. {quality_settings}. Perfect for social media."
-        elif "thanksgiving" in holiday_name.lower():
-            return f"Professional photograph of warm, welcoming Thanksgiving elements with modern web design concepts subtly integrated. Clean, cozy composition with autumn colors. {quality_settings}. Perfect for social media."
-        else:
-            return f"Professional photograph of celebration elements with modern web design concepts subtly integrated. Clean, festive composition. {quality_settings}. Perfect for social media." 
\ No newline at end of file
+        key = holiday_info.get('key') or holiday_key_for_name(holiday_info.get('name', ''))
+        return build_holiday_image_prompt(key, quality_settings)
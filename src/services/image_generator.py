@@ -4,160 +4,354 @@ Handles image generation, prompt enhancement, and image management.
 """
 
 import os
-import random
+import re
+import asyncio
+import time
+import itertools
 import hashlib
-from datetime import datetime
-from typing import Dict, Any, Optional
-from PIL import Image
-import requests
-from io import BytesIO
-from openai import OpenAI
-from ..core.config import IMAGE_SETTINGS, IMAGES_DIRECTORY, POST_TYPE_CONFIGS
+import sqlite3
+import threading
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple, TYPE_CHECKING
+from ..core.utils import get_http_session
+from ._holiday_prompts import QUALITY_SETTINGS, build_holiday_image_prompt, holiday_key_for_name
+from ..core.config import IMAGE_API_KWARGS, FALLBACK_IMAGE_API_KWARGS, IMAGE_SETTINGS, IMAGES_DIRECTORY, POST_TYPE_CONFIGS
+
+if TYPE_CHECKING:
+    import httpx
+    from openai import OpenAI, AsyncOpenAI
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Bytes buffered in memory before each off-loop disk write in async downloads
+_WRITE_BATCH_SIZE = 1 << 20
+
+# SQLite manifest of saved images, kept alongside them in the images directory
+MANIFEST_FILENAME = ".manifest.sqlite"
+
+# Saved image names: <post_type>_<time_ns>_<content hash>_<seq>.png
+_IMAGE_NAME = re.compile(r"^(?P<post_type>.+)_\d+_(?P<hash>[0-9a-f]{16})_\d+\.png$")
 
 
 class ImageGenerator:
     """Generates images using DALL-E 3 and manages image storage."""
     
-    def __init__(self, client: OpenAI):
+    def __init__(self, client: 'OpenAI'):
         self.client = client
-    
-    def generate_image_prompt(self, post_content: str, post_type: str, holiday_info: Dict[str, Any] | None = None) -> str:
-        """Generate a specific, detailed image prompt based on the actual post content."""
-        
-        # If it's a holiday post, use holiday-specific image generation
-        if post_type == "holiday" and holiday_info:
-            quality_settings = "high quality, professional photography, clean composition, no text, no words, no letters, minimalist design"
-            return self.create_holiday_image_prompt(holiday_info, quality_settings)
-        
-        # Extract key elements from the post content
-        content_lower = post_content.lower()
+        # Pooled session so image downloads reuse TCP/TLS connections
+        self._http = get_http_session()
+        # Counter for unique image filenames within this process
+        self._seq = itertools.count()
+        # Final image prompt per post type, built once from configuration
+        default_image_prompt = "Professional photograph of a modern laptop displaying a clean, minimalist website design. Clean composition with professional web design elements."
+        self._default_prompt = f"{default_image_prompt} {QUALITY_SETTINGS}. Perfect for social media."
+        self._prompt_by_type = {
+            post_type: f"{config.get('image_prompt', default_image_prompt)} {QUALITY_SETTINGS}. Perfect for social media."
+            for post_type, config in POST_TYPE_CONFIGS.items()
+        }
+        # Images API arguments per post type, applying any quality/size overrides
+        self._api_kwargs_by_type = {
+            post_type: {
+                **IMAGE_API_KWARGS,
+                "quality": config.get("image_quality", IMAGE_API_KWARGS["quality"]),
+                "size": config.get("image_size", IMAGE_API_KWARGS["size"]),
+            }
+            for post_type, config in POST_TYPE_CONFIGS.items()
+        }
         
-        # Create a focused, specific prompt based on post type and content
-        prompt = self.create_focused_image_prompt(post_content, post_type, content_lower)
+        # Content hash -> saved image manifest, so lookups skip a directory scan
+        self._conn_lock = threading.Lock()
+        self._conn = self._open_manifest()
         
-        return prompt
+        # (event loop, AsyncOpenAI, httpx.AsyncClient) for async generation, made on first use
+        self._async_clients: Optional[Tuple[asyncio.AbstractEventLoop, 'AsyncOpenAI', 'httpx.AsyncClient']] = None
     
-    def create_focused_image_prompt(self, post_content: str, post_type: str, content_lower: str) -> str:
-        """Create a focused, specific image prompt using configuration."""
-        
-        # Base quality settings
-        quality_settings = "high quality, professional photography, clean composition, no text, no words, no letters, minimalist design"
-        
-        # Get post type configuration
-        post_config = POST_TYPE_CONFIGS.get(post_type, {})
-        base_image_prompt = post_config.get('image_prompt', 
-            f"Professional photograph of a modern laptop displaying a clean, minimalist website design. Clean composition with professional web design elements.")
-        
-        # For holiday posts, use special handling
+    def generate_image_prompt(self, post_content: str, post_type: str, holiday_info: Optional[Dict[str, Any]] = None) -> str:
+        """Generate a specific, detailed image prompt based on the actual post content."""
+        # Holiday posts with holiday details get a holiday-specific prompt; everything
+        # else (including holiday posts without details) uses the configured prompt
         if post_type == "holiday":
-            return self.create_holiday_image_prompt(post_content, quality_settings)
-        
-        # For other post types, use the configured image prompt
-        return f"{base_image_prompt} {quality_settings}. Perfect for social media."
+            if holiday_info:
+                return self.create_holiday_image_prompt(holiday_info, QUALITY_SETTINGS)
+            print("⚠️  Holiday post without holiday details - using the generic holiday image prompt")
+        return self.create_focused_image_prompt(post_content, post_type)
+    
+    def create_focused_image_prompt(self, post_content: str, post_type: str, content_lower: str = "") -> str:
+        """Create a focused, specific image prompt using configuration."""
+        return self._prompt_by_type.get(post_type, self._default_prompt)
     
     def create_holiday_image_prompt(self, holiday_info: Dict[str, Any], quality_settings: str) -> str:
         """Create a specific image prompt for holiday posts."""
-        holiday_name = holiday_info['name']
-        
-        if "independence" in holiday_name.lower() or "july" in holiday_name.lower():
-            return f"Professional photograph of American flag with modern web design elements subtly integrated. Clean, patriotic composition with red, white, and blue color scheme. {quality_settings}. Perfect for social media."
-        elif "christmas" in holiday_name.lower():
-            return f"Professional photograph of festive holiday decorations with modern web design elements subtly integrated. Clean, warm composition with holiday colors. {quality_settings}. Perfect for social media."
-        elif "thanksgiving" in holiday_name.lower():
-            return f"Professional photograph of warm, welcoming Thanksgiving elements with modern web design concepts subtly integrated. Clean, cozy composition with autumn colors. {quality_settings}. Perfect for social media."
-        else:
-            return f"Professional photograph of celebration elements with modern web design concepts subtly integrated. Clean, festive composition. {quality_settings}. Perfect for social media."
+        key = holiday_info.get('key') or holiday_key_for_name(holiday_info.get('name', ''))
+        return build_holiday_image_prompt(key, quality_settings)
+    
+    def _content_hash(self, content: str) -> str:
+        """Create a short, non-cryptographic hash of the content, embedded in image filenames."""
+        return hashlib.blake2b(content.encode(), digest_size=8, usedforsecurity=False).hexdigest()
+    
+    def _open_manifest(self) -> sqlite3.Connection:
+        """Open (creating if needed) the SQLite manifest of saved images."""
+        os.makedirs(IMAGES_DIRECTORY, exist_ok=True)
+        conn = sqlite3.connect(os.path.join(IMAGES_DIRECTORY, MANIFEST_FILENAME), check_same_thread=False)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS images ("
+            "hash TEXT PRIMARY KEY, path TEXT NOT NULL, post_type TEXT, created REAL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS images_path ON images(path)")
+        conn.commit()
+        # Images saved before the manifest existed are indexed once from their filenames
+        if conn.execute("PRAGMA user_version").fetchone()[0] == 0:
+            self._backfill_manifest(conn)
+        return conn
+    
+    def _backfill_manifest(self, conn: sqlite3.Connection):
+        """Record existing images whose filenames carry a content hash, then mark the scan done."""
+        rows = []
+        with os.scandir(IMAGES_DIRECTORY) as entries:
+            for entry in entries:
+                match = _IMAGE_NAME.match(entry.name)
+                if match and entry.is_file():
+                    rows.append((match['hash'], entry.name, match['post_type'], entry.stat().st_mtime))
+        with conn:
+            # An image recorded since keeps its entry
+            conn.executemany(
+                "INSERT OR IGNORE INTO images (hash, path, post_type, created) VALUES (?, ?, ?, ?)", rows
+            )
+            conn.execute("PRAGMA user_version = 1")
+        if rows:
+            print(f"🗂️ Indexed {len(rows)} existing images in the image manifest")
+    
+    def _record_image(self, filename: str, post_type: str, content_hash: str):
+        """Record a saved image in the manifest under its content hash."""
+        if not content_hash:
+            return
+        try:
+            with self._conn_lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO images (hash, path, post_type, created) VALUES (?, ?, ?, ?)",
+                    (content_hash, filename, post_type, time.time())
+                )
+        except sqlite3.Error as e:
+            print(f"❌ Error updating image manifest: {e}")
     
     def check_existing_images(self, post_type: str, content: str) -> Optional[str]:
         """Check if we already have an image for similar content."""
         try:
-            # Create a simple hash of the content to check for similarity
-            content_hash = hashlib.md5(content.encode()).hexdigest()[:8]
-            
-            # Look for existing images with similar content hash
-            if os.path.exists(IMAGES_DIRECTORY):
-                for filename in os.listdir(IMAGES_DIRECTORY):
-                    if filename.endswith(".png") and content_hash in filename:
-                        full_path = os.path.join(IMAGES_DIRECTORY, filename)
-                        if os.path.exists(full_path):
-                            print(f"🔄 Found existing image for similar content: {filename}")
-                            return full_path
+            # Look for an existing image with the same content hash
+            content_hash = self._content_hash(content)
+            with self._conn_lock:
+                row = self._conn.execute("SELECT path FROM images WHERE hash = ?", (content_hash,)).fetchone()
+            if row is None:
+                return None
+            full_path = os.path.join(IMAGES_DIRECTORY, row[0])
+            if os.path.exists(full_path):
+                print(f"🔄 Found existing image for similar content: {row[0]}")
+                # Same generated_images/ form as a newly generated image
+                return f"generated_images/{row[0]}"
+            # The file was removed; drop its stale manifest entry
+            with self._conn_lock, self._conn:
+                self._conn.execute("DELETE FROM images WHERE hash = ?", (content_hash,))
             return None
         except Exception as e:
             print(f"❌ Error checking existing images: {e}")
             return None
     
-    def generate_image(self, post_content: str, post_type: str, holiday_info: Dict[str, Any] | None = None) -> Optional[str]:
+    def _prepare_image(self, post_content: str, post_type: str, holiday_info: Optional[Dict[str, Any]], skip_cache: bool) -> Tuple[Optional[str], str]:
+        """Return an existing image for the content (unless skip_cache), or the prompt for a new one."""
+        # First check if we already have an image for similar content,
+        # unless the caller knows the content is new
+        existing_image = None if skip_cache else self.check_existing_images(post_type, post_content)
+        if existing_image:
+            print(f"🔄 Using existing image: {existing_image}")
+            return existing_image, ""
+        
+        # Generate the base image prompt
+        base_prompt = self.generate_image_prompt(post_content, post_type, holiday_info)
+        
+        print(f"🎨 Generating image for post type: {post_type}")
+        print(f"📝 Image prompt: {base_prompt}")
+        print(f"📄 Post content preview: {post_content[:100]}...")
+        return None, base_prompt
+    
+    def _image_request(self, post_type: str, prompt: str) -> Dict[str, Any]:
+        """Images API arguments for one DALL-E 3 image."""
+        return {
+            "model": "dall-e-3",
+            "prompt": prompt,
+            "n": 1,
+            **self._api_kwargs_by_type.get(post_type, FALLBACK_IMAGE_API_KWARGS)
+        }
+    
+    def _image_url(self, response) -> Optional[str]:
+        """The image URL in an Images API response, reporting why when there is none."""
+        if not (response and response.data):
+            print("❌ No image data received from DALL-E 3")
+            return None
+        image_url = response.data[0].url
+        if not image_url:
+            print("❌ No image URL received from DALL-E 3")
+        return image_url
+    
+    def generate_image(self, post_content: str, post_type: str, holiday_info: Optional[Dict[str, Any]] = None, skip_cache: bool = False) -> Optional[str]:
         """Generate an image using DALL-E 3 with base prompts."""
         try:
-            # First check if we already have an image for similar content
-            existing_image = self.check_existing_images(post_type, post_content)
+            existing_image, base_prompt = self._prepare_image(post_content, post_type, holiday_info, skip_cache)
             if existing_image:
-                print(f"🔄 Using existing image: {existing_image}")
                 return existing_image
             
-            # Generate the base image prompt
-            base_prompt = self.generate_image_prompt(post_content, post_type, holiday_info)
-            
-            print(f"🎨 Generating image for post type: {post_type}")
-            print(f"📝 Image prompt: {base_prompt}")
-            print(f"📄 Post content preview: {post_content[:100]}...")
-            
             # Use DALL-E 3 with the base prompt
-            response = self.client.images.generate(
-                model="dall-e-3",
-                prompt=base_prompt,
-                size=IMAGE_SETTINGS["size"],
-                quality=IMAGE_SETTINGS["quality"],
-                n=1,
-                style=IMAGE_SETTINGS["style"]
-            )
+            response = self.client.images.generate(**self._image_request(post_type, base_prompt))
             
-            if response and response.data:
-                image_url = response.data[0].url
-                
-                # Download and save the image
-                if image_url:
-                    image_filename = self.download_and_save_image(image_url, post_type)
-                    
-                    print(f"✅ Image generated successfully: {image_filename}")
-                    return image_filename
-                else:
-                    print("❌ No image URL received from DALL-E 3")
-                    return None
-            else:
-                print("❌ No image data received from DALL-E 3")
+            image_url = self._image_url(response)
+            if not image_url:
                 return None
+            
+            # Download and save the image
+            image_filename = self.download_and_save_image(image_url, post_type, self._content_hash(post_content))
+            print(f"✅ Image generated successfully: {image_filename}")
+            return image_filename
                 
         except Exception as e:
             print(f"❌ Error generating image: {e}")
             return None
     
-    def download_and_save_image(self, image_url: str, post_type: str) -> Optional[str]:
+    def download_and_save_image(self, image_url: str, post_type: str, content_hash: str = "") -> Optional[str]:
         """Download image from URL and save it locally."""
         try:
-            # Create images directory if it doesn't exist
-            os.makedirs(IMAGES_DIRECTORY, exist_ok=True)
+            filename = self._new_image_filename(post_type, content_hash)
             
-            # Generate filename with content hash for uniqueness
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            # Use a combination of timestamp and random component for uniqueness
-            random_suffix = random.randint(1000, 9999)
-            filename = os.path.join(IMAGES_DIRECTORY, f"{post_type}_{timestamp}_{random_suffix}.png")
+            # Stream the PNG straight to disk; DALL-E already returns a valid PNG,
+            # so there is no need to decode and re-encode it
+            with self._http.get(image_url, stream=True, timeout=60) as response:
+                response.raise_for_status()
+                with open(filename, 'wb', buffering=1 << 20) as f:
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        f.write(chunk)
             
-            # Download image
-            response = requests.get(image_url)
-            response.raise_for_status()
+            return self._finish_saved_image(filename, post_type, content_hash)
             
-            # Open and save image
-            image = Image.open(BytesIO(response.content))
-            image.save(filename, "PNG")
+        except Exception as e:
+            print(f"❌ Error downloading/saving image: {e}")
+            return None
+    
+    def _finish_saved_image(self, filename: str, post_type: str, content_hash: str) -> str:
+        """Verify and record a downloaded image, returning its generated_images/ path."""
+        self._verify_saved_image(filename)
+        self._record_image(os.path.basename(filename), post_type, content_hash)
+        print(f"💾 Image saved to: {filename}")
+        # Return the path in the format expected by the rest of the system (generated_images/filename.png)
+        return f"generated_images/{os.path.basename(filename)}"
+    
+    def _verify_saved_image(self, filename: str):
+        """Remove and reject a downloaded file that is not a PNG (only when enabled)."""
+        if not IMAGE_SETTINGS.get("verify_downloads"):
+            return
+        with open(filename, 'rb') as f:
+            signature = f.read(len(_PNG_SIGNATURE))
+        if signature != _PNG_SIGNATURE:
+            os.remove(filename)
+            raise ValueError(f"Downloaded image is not a PNG: {filename}")
+    
+    def _new_image_filename(self, post_type: str, content_hash: str = "") -> str:
+        """Build a unique path in the images directory for a new image."""
+        # Create images directory if it doesn't exist
+        os.makedirs(IMAGES_DIRECTORY, exist_ok=True)
+        
+        # Generate filename with content hash; a nanosecond timestamp plus a
+        # per-process counter keeps names unique without a PRNG or strftime
+        timestamp = time.time_ns()
+        seq = next(self._seq)
+        if content_hash:
+            return os.path.join(IMAGES_DIRECTORY, f"{post_type}_{timestamp}_{content_hash}_{seq}.png")
+        return os.path.join(IMAGES_DIRECTORY, f"{post_type}_{timestamp}_{seq}.png")
+    
+    def _get_async_clients(self) -> Tuple['AsyncOpenAI', 'httpx.AsyncClient']:
+        """Async OpenAI and download clients for the running event loop, created once per loop."""
+        # Async clients are bound to the loop they were first used on, and each
+        # asyncio.run() call has its own loop
+        loop = asyncio.get_running_loop()
+        if self._async_clients is None or self._async_clients[0] is not loop:
+            import httpx
+            from openai import AsyncOpenAI
+            # Same endpoint, timeouts, retries and HTTP/2 pooling as the shared sync client
+            aclient = AsyncOpenAI(
+                api_key=self.client.api_key,
+                base_url=self.client.base_url,
+                timeout=self.client.timeout,
+                max_retries=self.client.max_retries,
+                http_client=httpx.AsyncClient(
+                    http2=True,
+                    limits=httpx.Limits(max_connections=10, max_keepalive_connections=10)
+                )
+            )
+            self._async_clients = (loop, aclient, httpx.AsyncClient(timeout=60))
+        return self._async_clients[1], self._async_clients[2]
+    
+    async def aclose_async_clients(self):
+        """Close the async clients, if any; call before the event loop that uses them ends."""
+        if self._async_clients is None:
+            return
+        _, aclient, ahttp = self._async_clients
+        self._async_clients = None
+        try:
+            await aclient.close()
+        finally:
+            await ahttp.aclose()
+    
+    async def generate_image_async(self, post_content: str, post_type: str, holiday_info: Optional[Dict[str, Any]] = None, skip_cache: bool = False) -> Optional[str]:
+        """Async variant of generate_image so several images can be generated concurrently."""
+        try:
+            # The manifest lookup is blocking SQLite I/O, so it runs off the event loop
+            existing_image, base_prompt = await asyncio.to_thread(
+                self._prepare_image, post_content, post_type, holiday_info, skip_cache
+            )
+            if existing_image:
+                return existing_image
+            
+            aclient, _ = self._get_async_clients()
+            response = await aclient.images.generate(**self._image_request(post_type, base_prompt))
+            
+            image_url = self._image_url(response)
+            if not image_url:
+                return None
+            
+            # Download and save the image
+            image_filename = await self.download_and_save_image_async(image_url, post_type, self._content_hash(post_content))
+            print(f"✅ Image generated successfully: {image_filename}")
+            return image_filename
+                
+        except Exception as e:
+            print(f"❌ Error generating image: {e}")
+            return None
+    
+    async def download_and_save_image_async(self, image_url: str, post_type: str, content_hash: str = "") -> Optional[str]:
+        """Async variant of download_and_save_image."""
+        try:
+            filename = self._new_image_filename(post_type, content_hash)
+            
+            _, ahttp = self._get_async_clients()
+            async with ahttp.stream("GET", image_url) as response:
+                response.raise_for_status()
+                # Disk writes run in a worker thread, batched so the event loop
+                # keeps serving other downloads and API calls meanwhile
+                with open(filename, 'wb') as f:
+                    pending = bytearray()
+                    async for chunk in response.aiter_bytes(64 * 1024):
+                        pending += chunk
+                        if len(pending) >= _WRITE_BATCH_SIZE:
+                            await asyncio.to_thread(f.write, bytes(pending))
+                            pending.clear()
+                    if pending:
+                        await asyncio.to_thread(f.write, bytes(pending))
             
-            print(f"💾 Image saved to: {filename}")
-            # Return the path in the format expected by the rest of the system (generated_images/filename.png)
-            relative_path = f"generated_images/{os.path.basename(filename)}"
-            return relative_path
+            # Verifying reads the file back and recording writes the manifest; both block
+            return await asyncio.to_thread(self._finish_saved_image, filename, post_type, content_hash)
             
         except Exception as e:
             print(f"❌ Error downloading/saving image: {e}")
-            return None 
\ No newline at end of file
+            return None
+
+@lru_cache(maxsize=1)
+def get_image_generator(client: 'OpenAI') -> ImageGenerator:
+    """Get the shared ImageGenerator for a client; pass the same OpenAI client each time."""
+    return ImageGenerator(client)
@@ -3,31 +3,145 @@ Post Generator module for creating social media posts.
 Handles content generation, prompts, and post formatting.
 """
 
+import os
+import json
+import time
 import random
+import re
+import hashlib
+import sqlite3
+import threading
 from datetime import datetime
-from typing import Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Any, List, Callable, Optional
+from urllib.parse import urljoin
 from openai import OpenAI
 from ..core.config import (
     COMPANY_CONFIG, POST_CATEGORIES, HASHTAGS, FALLBACK_POSTS,
-    MAX_POST_GENERATION_ATTEMPTS, POST_TYPE_CONFIGS
+    MAX_POST_GENERATION_ATTEMPTS, POST_TYPE_CONFIGS, DATA_DIRECTORY
 )
-import requests
+from ..core.utils import get_http_session, json_loads
 
-def extract_text_from_blocks(blocks, max_length=400):
-    texts = []
+# Cached OpenAI chat responses (e.g. blog captions) are reused for this long
+_CHAT_CACHE_MAX_AGE = 30 * 24 * 60 * 60
+_CHAT_CACHE_MAX_ENTRIES = 500
+
+# Strapi endpoint for the most recently published blog post, and the public site it links to
+_STRAPI_LATEST_POST_URL = 'http://127.0.0.1:1337/api/posts?populate=featuredImage&sort=publishedDate:desc&pagination[limit]=1&publicationState=live'
+_BLOG_SITE_URL = 'https://fishtownwebdesign.com'
+
+# Company context shared by every post prompt; COMPANY_CONFIG never changes at runtime
+_BASE_CONTEXT = f"""
+        Company: {COMPANY_CONFIG['name']}
+        Location: {COMPANY_CONFIG['location']}
+        Services: {', '.join(COMPANY_CONFIG['services'])}
+        Target Audience: {', '.join(COMPANY_CONFIG['target_audience'])}
+        Brand Voice: {COMPANY_CONFIG['brand_voice']}
+        Content Guidelines: {COMPANY_CONFIG['content_guidelines']}
+        
+        """
+
+# Holiday post prompt with the company context filled in; only the holiday name varies
+# (the context is brace-escaped so str.format leaves it untouched)
+_HOLIDAY_PROMPT_TEMPLATE = (
+    _BASE_CONTEXT.replace("{", "{{").replace("}", "}}")
+    + "Today is {holiday}. Generate a holiday-themed post that celebrates this special day while being relevant to web design and local Philadelphia businesses.\n        "
+    + "\n\nCelebrate {holiday} with a post that honors the significance of this national holiday while connecting it to web design and local business success."
+)
+
+# System message for single-post generation
+_POST_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are an expert social media manager for Fishtown Web Design. Generate ONE SINGLE engaging, authentic post that showcases web design expertise while being helpful to the local Philadelphia business community. Keep the post under 200 words and include relevant emojis. IMPORTANT: Generate only ONE post, not multiple numbered posts. Do not use numbers like '1)', '2)', '3)' in your response. Do not mention having a local office, physical workspace, or in-person meetings - we are a fully remote company serving the Philadelphia area."
+}
+
+
+@lru_cache(maxsize=16)
+def _candidates_system_message(count: int) -> Dict[str, str]:
+    """System message asking for count candidate posts as JSON (shared; do not mutate)."""
+    return {
+        "role": "system",
+        "content": f"You are an expert social media manager for Fishtown Web Design. Generate {count} DISTINCT engaging, authentic candidate posts that showcase web design expertise while being helpful to the local Philadelphia business community. Each candidate is ONE SINGLE post under 200 words with relevant emojis. Do not use numbers like '1)', '2)', '3)' inside a post. Do not mention having a local office, physical workspace, or in-person meetings - we are a fully remote company serving the Philadelphia area. Return only JSON in the form {{\"candidates\": [{{\"content\": \"...\"}}]}}."
+    }
+
+# Completion budget per candidate post (~200 words with emojis), plus the JSON
+# array and key framing around them
+_CANDIDATE_MAX_TOKENS = 320
+_CANDIDATES_FRAMING_TOKENS = 64
+
+# A complete {"content": "..."} object, for salvaging candidates from a truncated reply
+_CANDIDATE_OBJECT = re.compile(r'\{\s*"content"\s*:\s*"(?:[^"\\]|\\.)*"\s*\}')
+
+# Lines starting with a number followed by ) or . mark extra numbered posts
+# (matched across the whole text in one pass)
+_NUMBERED_LINES = re.compile(r"^\s*\d[).].*$", re.MULTILINE)
+
+
+def _parse_candidates(raw: str) -> List[Any]:
+    """Candidates from a JSON reply, keeping the complete ones if the reply was cut off."""
+    try:
+        # Tolerate the model wrapping the JSON in a code fence
+        return json_loads(raw[raw.find('{'):raw.rfind('}') + 1]).get('candidates', [])
+    except (ValueError, AttributeError):
+        candidates = [json_loads(match.group()) for match in _CANDIDATE_OBJECT.finditer(raw)]
+        print(f"Warning: candidates reply was not valid JSON - kept {len(candidates)} complete candidates")
+        return candidates
+
+
+def _clean_content(content: str) -> str:
+    """Strip lines and drop numbered-post lines so the content is a single post."""
+    content = _NUMBERED_LINES.sub("", content)
+    return "\n".join(line for line in (raw.strip() for raw in content.split("\n")) if line)
+
+# Reused scratch copy of HASHTAGS for sampling without a fresh list per call
+_HASHTAG_SCRATCH = list(HASHTAGS)
+_HASHTAG_LOCK = threading.Lock()
+
+
+def _sample_hashtags(k: int) -> List[str]:
+    """Pick k distinct random hashtags (partial Fisher-Yates over the scratch list)."""
+    with _HASHTAG_LOCK:
+        scratch = _HASHTAG_SCRATCH
+        n = len(scratch)
+        for i in range(k):
+            j = random.randrange(i, n)
+            scratch[i], scratch[j] = scratch[j], scratch[i]
+        return scratch[:k]
+
+def _iter_block_text(blocks):
+    """Yield the text of paragraph, heading and list blocks in document order."""
     for block in blocks:
+        block_type = block.get('type')
         # Paragraphs and headings
-        if block.get('type') in ('paragraph', 'heading'):
-            for child in block.get('children', []):
+        if block_type in ('paragraph', 'heading'):
+            for child in block.get('children', ()):
                 if isinstance(child, dict) and 'text' in child:
-                    texts.append(child['text'])
+                    yield child['text']
         # Optionally handle lists
-        elif block.get('type') == 'list':
-            for item in block.get('children', []):
+        elif block_type == 'list':
+            for item in block.get('children', ()):
                 if isinstance(item, dict) and 'children' in item:
                     for child in item['children']:
                         if isinstance(child, dict) and 'text' in child:
-                            texts.append(child['text'])
+                            yield child['text']
+
+def _featured_image_url(featured_image: Dict[str, Any]) -> str:
+    """Absolute URL of a featured image, preferring the medium, then small format."""
+    formats = featured_image.get('formats') or {}
+    fmt = next((formats[k] for k in ('medium', 'small') if k in formats), None)
+    return urljoin(_BLOG_SITE_URL, fmt['url'] if fmt else featured_image.get('url', ''))
+
+
+def extract_text_from_blocks(blocks, max_length=400):
+    texts = []
+    length = -1
+    for text in _iter_block_text(blocks):
+        texts.append(text)
+        length += len(text) + 1
+        # Stop walking the document once the kept text is certain to be truncated
+        if length > max_length and len(' '.join(texts).strip()) > max_length:
+            break
     summary = ' '.join(texts).strip()
     if len(summary) > max_length:
         summary = summary[:max_length].rsplit(' ', 1)[0] + '...'
@@ -36,23 +150,49 @@ def extract_text_from_blocks(blocks, max_length=400):
 class PostGenerator:
     """Generates social media posts using OpenAI API."""
     
-    def __init__(self, client: OpenAI):
+    def __init__(self, client: OpenAI, holiday_lookup: Optional[Callable[[], Optional[Dict[str, Any]]]] = None):
         self.client = client
+        # Optional cached resolver for today's holiday, used instead of a fresh scan
+        self.holiday_lookup = holiday_lookup
+        # Exact-match OpenAI response cache, opened on first use
+        self._chat_cache_conn: Optional[sqlite3.Connection] = None
+        self._chat_cache_lock = threading.Lock()
+        # Prompts and hashtags per post type, built once from configuration
+        self._prompt_by_type = {post_type: self._build_prompt(post_type) for post_type in POST_TYPE_CONFIGS}
+        # Chat messages per post type, built on first use and reused for every request
+        self._user_message_by_type: Dict[str, Dict[str, str]] = {}
+        self._messages_by_type: Dict[str, List[Dict[str, str]]] = {}
+        self._hashtags_by_type = {
+            post_type: config.get('hashtags', []) for post_type, config in POST_TYPE_CONFIGS.items()
+        }
     
-    def generate_unique_post(self, post_manager, holiday_manager) -> Dict[str, Any]:
+    def generate_unique_post(self, post_manager, holiday_manager, force_regenerate: bool = False) -> Dict[str, Any]:
         """Generate a unique post that hasn't been used recently."""
+        # Reruns on the same day reuse today's saved post instead of calling OpenAI again
+        if not force_regenerate:
+            existing = post_manager.get_todays_post()
+            if existing:
+                print("♻️ Today's post already exists - reusing it (pass force_regenerate=True for a new one)")
+                post = dict(existing)
+                post_id = post.get('id', 'post')
+                post['id'] = post_id if post_id.endswith('_rerun') else f"{post_id}_rerun"
+                post['reused'] = True
+                return post
+        
         # First check if today is a holiday
-        holiday_info = holiday_manager.check_if_holiday()
+        if self.holiday_lookup:
+            holiday_info = self.holiday_lookup()
+        else:
+            holiday_info = holiday_manager.check_if_holiday()
         
         if holiday_info:
             print(f"🎉 Today is {holiday_info['name']}! Generating holiday-themed post...")
-            post = self.generate_holiday_post(holiday_info)
+            post = self.generate_holiday_post(holiday_info, holiday_manager)
             if post is None:
                 print("❌ Failed to generate holiday post, falling back to regular post...")
                 # Continue to regular post generation below
             else:
-                post['generated_at'] = datetime.now().isoformat()
-                post['id'] = f"holiday_post_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                self._stamp_post(post, "holiday_post")
                 post_manager.add_post(post)
                 return post
         
@@ -61,22 +201,14 @@ class PostGenerator:
         if today.weekday() == 6:  # Sunday is 6
             try:
                 # Fetch the latest blog post from Strapi
-                url = 'http://127.0.0.1:1337/api/posts?populate=featuredImage&sort=publishedDate:desc&pagination[limit]=1&publicationState=live'
-                response = requests.get(url)
-                data = response.json()
-                posts = data.get('data', [])
-                if posts:
-                    post_data = posts[0]
-                    print('DEBUG: post_data from Strapi:', post_data)
+                post_data = self._fetch_latest_blog()
+                if post_data:
                     title = post_data.get('title', 'Our Latest Blog Post')
                     summary = post_data.get('summary')
-                    print('DEBUG: summary type:', type(summary), 'value:', summary)
                     if not summary:
                         content = post_data.get('content', '')
-                        print('DEBUG: content type:', type(content), 'value:', content)
                         if isinstance(content, list):
                             blog_text = extract_text_from_blocks(content, max_length=1200)
-                            print('DEBUG: extracted blog_text:', blog_text)
                         else:
                             blog_text = str(content)[:1200]
                         # Use AI to generate the caption
@@ -85,21 +217,10 @@ class PostGenerator:
                             summary = ai_caption
                         else:
                             summary = blog_text[:400] + '...'
-                        print('DEBUG: computed summary:', summary)
                     slug = post_data.get('slug', '')
-                    link = f"https://fishtownwebdesign.com/blog/{slug}" if slug else "https://fishtownwebdesign.com/blog"
-                    # Get featured image
+                    link = f"{_BLOG_SITE_URL}/blog/{slug}" if slug else f"{_BLOG_SITE_URL}/blog"
                     featured_image = post_data.get('featuredImage')
-                    image_url = None
-                    if featured_image:
-                        # Prefer medium, then small, then default
-                        formats = featured_image.get('formats', {})
-                        if 'medium' in formats:
-                            image_url = 'https://fishtownwebdesign.com' + formats['medium']['url']
-                        elif 'small' in formats:
-                            image_url = 'https://fishtownwebdesign.com' + formats['small']['url']
-                        else:
-                            image_url = 'https://fishtownwebdesign.com' + featured_image.get('url', '')
+                    image_url = _featured_image_url(featured_image) if featured_image else None
                     # Compose the social post
                     hashtags = POST_TYPE_CONFIGS['blog_promotion']['hashtags']
                     content = f"Check out our latest blog post: {title}\n\n{summary}\n\nRead more: {link}"
@@ -112,8 +233,7 @@ class PostGenerator:
                         "blog_link": link,
                         "blog_title": title
                     }
-                    post['generated_at'] = datetime.now().isoformat()
-                    post['id'] = f"blog_promotion_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                    self._stamp_post(post, "blog_promotion")
                     post_manager.add_post(post)
                     return post
                 else:
@@ -124,8 +244,6 @@ class PostGenerator:
                 return None
         
         # If not a holiday and not Monday, generate regular post
-        attempts = 0
-        
         # Create a filtered list of post types, excluding blog_promotion for non-Monday posts
         # Blog promotion posts should only be generated on Mondays when there's a new blog post
         available_post_types = [pt for pt in POST_CATEGORIES if pt != 'blog_promotion']
@@ -134,39 +252,101 @@ class PostGenerator:
         if not available_post_types:
             available_post_types = ['web_design_tip']  # Fallback to a safe default
         
-        while attempts < MAX_POST_GENERATION_ATTEMPTS:
-            post_type = random.choice(available_post_types)
-            post = self.generate_post_content(post_type)
-            
+        # One batched call for a single post type usually yields a usable post;
+        # other post types are only tried, concurrently, when every candidate is a repeat
+        post_types = random.sample(available_post_types, k=min(MAX_POST_GENERATION_ATTEMPTS, len(available_post_types)))
+        post = self._first_unique_post(
+            self.generate_post_candidates(post_types[0], MAX_POST_GENERATION_ATTEMPTS), post_manager
+        )
+        if post is None and len(post_types) > 1:
+            print(f"No usable {post_types[0]} candidate - trying other post types...")
+            with ThreadPoolExecutor(max_workers=len(post_types) - 1) as pool:
+                batches = list(pool.map(self.generate_post_candidates, post_types[1:], [1] * (len(post_types) - 1)))
+            post = self._first_unique_post([post for batch in batches for post in batch], post_manager)
+        if post is not None:
+            return post
+        
+        # If all candidates fail, generate a fallback post
+        return self.generate_fallback_post()
+    
+    def _first_unique_post(self, candidates: List[Dict[str, Any]], post_manager) -> Optional[Dict[str, Any]]:
+        """Stamp, record and return the first candidate not too similar to recent posts."""
+        for post in candidates:
             # Check if this content is too similar to recent posts
             if not post_manager.is_content_similar(post['content']):
-                post['generated_at'] = datetime.now().isoformat()
-                post['id'] = f"post_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                self._stamp_post(post, "post")
                 post_manager.add_post(post)
                 return post
-            
-            attempts += 1
+        return None
+    
+    def _fetch_latest_blog(self) -> Optional[Dict[str, Any]]:
+        """Latest published blog post from Strapi, or None when there is none."""
+        posts = self._fetch_latest_blog_response().get('data') or []
+        return posts[0] if posts else None
+    
+    def _fetch_latest_blog_response(self) -> Dict[str, Any]:
+        """Fetch the latest blog post from Strapi, reusing the cached response when unchanged."""
+        url = _STRAPI_LATEST_POST_URL
+        cache_path = os.path.join(DATA_DIRECTORY, 'strapi_latest_post.json')
+        try:
+            with open(cache_path, 'r') as f:
+                cached = json_loads(f.read())
+        except (FileNotFoundError, json.JSONDecodeError):
+            cached = {}
         
-        # If all attempts fail, generate a fallback post
-        return self.generate_fallback_post()
+        # Conditional GET so Strapi can answer 304 when the latest post is unchanged
+        headers = {}
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+        
+        response = get_http_session().get(url, headers=headers, timeout=(5, 30))
+        if response.status_code == 304 and 'response' in cached:
+            print("Latest blog post unchanged since last fetch - using cached response")
+            return cached['response']
+        
+        data = json_loads(response.content)
+        if response.headers.get('ETag') or response.headers.get('Last-Modified'):
+            try:
+                os.makedirs(DATA_DIRECTORY, exist_ok=True)
+                with open(cache_path, 'w') as f:
+                    json.dump({
+                        'etag': response.headers.get('ETag'),
+                        'last_modified': response.headers.get('Last-Modified'),
+                        'response': data
+                    }, f)
+            except OSError as e:
+                print(f"Error caching Strapi response: {e}")
+        return data
+    
+    def _user_message_for(self, post_type: str) -> Dict[str, str]:
+        """User message carrying the prompt for a post type, built once per type."""
+        message = self._user_message_by_type.get(post_type)
+        if message is None:
+            message = self._user_message_by_type[post_type] = {"role": "user", "content": self.create_prompt(post_type)}
+        return message
+    
+    def _messages_for(self, post_type: str) -> List[Dict[str, str]]:
+        """Single-post chat messages for a post type (shared; do not mutate)."""
+        messages = self._messages_by_type.get(post_type)
+        if messages is None:
+            messages = self._messages_by_type[post_type] = [_POST_SYSTEM_MESSAGE, self._user_message_for(post_type)]
+        return messages
+    
+    def _stamp_post(self, post: Dict[str, Any], id_prefix: str) -> Dict[str, Any]:
+        """Set generated_at and a timestamped id on a post from a single clock read."""
+        now = datetime.now()
+        post['generated_at'] = now.isoformat()
+        post['id'] = f"{id_prefix}_{now:%Y%m%d_%H%M%S}"
+        return post
     
     def generate_post_content(self, post_type: str) -> Dict[str, Any]:
         """Generate post content using OpenAI."""
-        prompt = self.create_prompt(post_type)
-        
         try:
             response = self.client.chat.completions.create(
                 model="gpt-4",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert social media manager for Fishtown Web Design. Generate ONE SINGLE engaging, authentic post that showcases web design expertise while being helpful to the local Philadelphia business community. Keep the post under 200 words and include relevant emojis. IMPORTANT: Generate only ONE post, not multiple numbered posts. Do not use numbers like '1)', '2)', '3)' in your response. Do not mention having a local office, physical workspace, or in-person meetings - we are a fully remote company serving the Philadelphia area."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
+                messages=self._messages_for(post_type),
                 max_tokens=250,
                 temperature=0.8
             )
@@ -178,36 +358,7 @@ class PostGenerator:
                 response.choices[0].message.content):
                 
                 content = response.choices[0].message.content.strip()
-                
-                # Clean up content to ensure only one post
-                # Remove any numbered posts (1), 2), 3), etc.)
-                lines = content.split('\n')
-                cleaned_lines = []
-                for line in lines:
-                    line = line.strip()
-                    # Skip lines that start with numbers followed by ) or .
-                    if line and not (line[0].isdigit() and len(line) > 1 and line[1] in [')', '.']):
-                        cleaned_lines.append(line)
-                
-                # Join the cleaned lines
-                content = '\n'.join(cleaned_lines).strip()
-                
-                # Get hashtags from post type config, fall back to general hashtags
-                post_config = POST_TYPE_CONFIGS.get(post_type, {})
-                type_hashtags = post_config.get('hashtags', [])
-                
-                if type_hashtags:
-                    # Use post type specific hashtags + some general hashtags
-                    hashtags = type_hashtags + random.sample(HASHTAGS, 3)
-                else:
-                    hashtags = random.sample(HASHTAGS, 6)
-                
-                return {
-                    "type": post_type,
-                    "content": content,
-                    "hashtags": hashtags,
-                    "full_post": f"{content}\n\n{' '.join(hashtags)}"
-                }
+                return self._build_post(post_type, content)
             else:
                 print("Warning: Empty response from OpenAI API")
                 return self.generate_fallback_post()
@@ -216,26 +367,80 @@ class PostGenerator:
             print(f"Error generating post: {e}")
             return self.generate_fallback_post()
     
+    def generate_post_candidates(self, post_type: str, count: int) -> List[Dict[str, Any]]:
+        """Generate several candidate posts for a post type in a single OpenAI call."""
+        try:
+            response = self.client.chat.completions.create(
+                model="gpt-4",
+                messages=[_candidates_system_message(count), self._user_message_for(post_type)],
+                max_tokens=_CANDIDATE_MAX_TOKENS * count + _CANDIDATES_FRAMING_TOKENS,
+                temperature=0.9
+            )
+            
+            # Check if response and content exist
+            if (response and response.choices and 
+                len(response.choices) > 0 and 
+                response.choices[0].message and 
+                response.choices[0].message.content):
+                
+                candidates = _parse_candidates(response.choices[0].message.content.strip())
+                
+                posts = []
+                for candidate in candidates[:count]:
+                    content = candidate.get('content', '') if isinstance(candidate, dict) else ''
+                    if content.strip():
+                        posts.append(self._build_post(post_type, content.strip()))
+                return posts
+            else:
+                print("Warning: Empty response from OpenAI API")
+                return []
+            
+        except Exception as e:
+            print(f"Error generating post candidates: {e}")
+            return []
+    
+    def _build_post(self, post_type: str, content: str) -> Dict[str, Any]:
+        """Clean generated content and attach hashtags for the post type."""
+        # Clean up content to ensure only one post
+        # Remove any numbered posts (1), 2), 3), etc.)
+        content = _clean_content(content)
+        
+        # Get hashtags from post type config, fall back to general hashtags
+        type_hashtags = self._hashtags_by_type.get(post_type, [])
+        
+        if type_hashtags:
+            # Use post type specific hashtags + some general hashtags
+            hashtags = type_hashtags + _sample_hashtags(3)
+        else:
+            hashtags = _sample_hashtags(6)
+        
+        return {
+            "type": post_type,
+            "content": content,
+            "hashtags": hashtags,
+            "full_post": f"{content}\n\n{' '.join(hashtags)}"
+        }
+    
     def create_prompt(self, post_type: str) -> str:
         """Create specific prompt for post type using configuration."""
-        base_context = f"""
-        Company: {COMPANY_CONFIG['name']}
-        Location: {COMPANY_CONFIG['location']}
-        Services: {', '.join(COMPANY_CONFIG['services'])}
-        Target Audience: {', '.join(COMPANY_CONFIG['target_audience'])}
-        Brand Voice: {COMPANY_CONFIG['brand_voice']}
-        Content Guidelines: {COMPANY_CONFIG['content_guidelines']}
-        
-        Generate a {post_type.replace('_', ' ')} post that is engaging, authentic, and relevant to local Philadelphia businesses.
-        """
+        prompt = self._prompt_by_type.get(post_type)
+        if prompt is None:
+            # Post types outside the configuration are built once, then reused
+            prompt = self._prompt_by_type[post_type] = self._build_prompt(post_type)
+        return prompt
+    
+    def _build_prompt(self, post_type: str) -> str:
+        """Build the prompt for a post type from company and post type configuration."""
+        readable_type = post_type.replace('_', ' ')
+        base_context = _BASE_CONTEXT + f"Generate a {readable_type} post that is engaging, authentic, and relevant to local Philadelphia businesses.\n        "
         
         # Get post type configuration
         post_config = POST_TYPE_CONFIGS.get(post_type, {})
-        description = post_config.get('description', f"Generate a {post_type.replace('_', ' ')} post.")
+        description = post_config.get('description', f"Generate a {readable_type} post.")
         
         return base_context + f"\n\n{description}"
     
-    def generate_holiday_post(self, holiday_info: Dict[str, Any]) -> Dict[str, Any]:
+    def generate_holiday_post(self, holiday_info: Dict[str, Any], holiday_manager) -> Dict[str, Any]:
         """Generate a holiday-specific post."""
         holiday_name = holiday_info['name']
         holiday_type = holiday_info['type']
@@ -269,25 +474,15 @@ class PostGenerator:
                 content = response.choices[0].message.content.strip()
                 
                 # Clean up content to ensure only one post
-                lines = content.split('\n')
-                cleaned_lines = []
-                for line in lines:
-                    line = line.strip()
-                    # Skip lines that start with numbers followed by ) or .
-                    if line and not (line[0].isdigit() and len(line) > 1 and line[1] in [')', '.']):
-                        cleaned_lines.append(line)
-                
-                # Join the cleaned lines
-                content = '\n'.join(cleaned_lines).strip()
+                content = _clean_content(content)
                 
                 # Add holiday-specific hashtags
-                from .holiday_manager import HolidayManager
-                holiday_manager = HolidayManager()
                 holiday_hashtags = holiday_manager.get_holiday_hashtags(holiday_info)
-                hashtags = random.sample(HASHTAGS, 4) + holiday_hashtags
+                hashtags = _sample_hashtags(4) + holiday_hashtags
                 
                 return {
                     "type": "holiday",
+                    "holiday_key": holiday_info.get('key', ''),
                     "holiday_name": holiday_name,
                     "holiday_type": holiday_type,
                     "content": content,
@@ -306,34 +501,82 @@ class PostGenerator:
     
     def create_holiday_prompt(self, holiday_info: Dict[str, Any]) -> str:
         """Create a specific prompt for holiday posts."""
-        holiday_name = holiday_info['name']
-        
-        base_context = f"""
-        Company: {COMPANY_CONFIG['name']}
-        Location: {COMPANY_CONFIG['location']}
-        Services: {', '.join(COMPANY_CONFIG['services'])}
-        Target Audience: {', '.join(COMPANY_CONFIG['target_audience'])}
-        Brand Voice: {COMPANY_CONFIG['brand_voice']}
-        Content Guidelines: {COMPANY_CONFIG['content_guidelines']}
-        
-        Today is {holiday_name}. Generate a holiday-themed post that celebrates this special day while being relevant to web design and local Philadelphia businesses.
-        """
-        
-        return base_context + f"\n\nCelebrate {holiday_name} with a post that honors the significance of this national holiday while connecting it to web design and local business success."
+        return _HOLIDAY_PROMPT_TEMPLATE.format(holiday=holiday_info['name'])
     
     def generate_fallback_post(self) -> Dict[str, Any]:
         """Generate fallback post if API fails."""
         content = random.choice(FALLBACK_POSTS)
-        hashtags = random.sample(HASHTAGS, 6)
+        hashtags = _sample_hashtags(6)
         
-        return {
+        post = {
             "type": "fallback",
             "content": content,
             "hashtags": hashtags,
-            "full_post": f"{content}\n\n{' '.join(hashtags)}",
-            "generated_at": datetime.now().isoformat(),
-            "id": f"fallback_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            "full_post": f"{content}\n\n{' '.join(hashtags)}"
         }
+        return self._stamp_post(post, "fallback")
+    
+    def _chat_cache(self) -> sqlite3.Connection:
+        """Open (once) the SQLite cache of OpenAI chat responses."""
+        if self._chat_cache_conn is None:
+            os.makedirs(DATA_DIRECTORY, exist_ok=True)
+            conn = sqlite3.connect(os.path.join(DATA_DIRECTORY, 'openai_cache.db'), check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, namespace TEXT, response TEXT NOT NULL, ts REAL NOT NULL)"
+            )
+            conn.commit()
+            self._chat_cache_conn = conn
+        return self._chat_cache_conn
+    
+    def _cached_chat(self, namespace: str, messages: List[Dict[str, str]], **params) -> Optional[str]:
+        """Run a chat completion, answering repeats of the exact same request from the cache.
+        
+        Only for calls whose output should be stable for the same input (e.g. blog
+        captions); post generation relies on fresh output to stay unique.
+        """
+        key = hashlib.sha256(
+            json.dumps([namespace, messages, params], sort_keys=True).encode()
+        ).hexdigest()
+        try:
+            with self._chat_cache_lock:
+                conn = self._chat_cache()
+                row = conn.execute(
+                    "SELECT response FROM cache WHERE key = ? AND ts >= ?",
+                    (key, time.time() - _CHAT_CACHE_MAX_AGE)
+                ).fetchone()
+                if row is not None:
+                    with conn:
+                        conn.execute("UPDATE cache SET ts = ? WHERE key = ?", (time.time(), key))
+                    print(f"🔄 OpenAI response cache hit ({namespace})")
+                    return row[0]
+        except sqlite3.Error as e:
+            print(f"Error reading OpenAI response cache: {e}")
+        print(f"OpenAI response cache miss ({namespace})")
+        
+        response = self.client.chat.completions.create(messages=messages, **params)
+        if not (response and response.choices and len(response.choices) > 0 and
+                response.choices[0].message and response.choices[0].message.content):
+            return None
+        content = response.choices[0].message.content
+        
+        try:
+            with self._chat_cache_lock:
+                conn = self._chat_cache()
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO cache (key, namespace, response, ts) VALUES (?, ?, ?, ?)",
+                        (key, namespace, content, time.time())
+                    )
+                    # Evict expired and least recently used entries
+                    conn.execute(
+                        "DELETE FROM cache WHERE ts < ? OR key NOT IN "
+                        "(SELECT key FROM cache ORDER BY ts DESC LIMIT ?)",
+                        (time.time() - _CHAT_CACHE_MAX_AGE, _CHAT_CACHE_MAX_ENTRIES)
+                    )
+        except sqlite3.Error as e:
+            print(f"Error updating OpenAI response cache: {e}")
+        return content
     
     def generate_blog_caption_with_ai(self, blog_title: str, blog_text: str, max_length: int = 400) -> str:
         """Generate a catchy, engaging social media caption for a blog post using OpenAI."""
@@ -345,17 +588,19 @@ class PostGenerator:
             f"Caption:"
         )
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
+            # The same blog post gets the same caption, so repeats skip the API call
+            caption = self._cached_chat(
+                "blog_caption",
+                [
                     {"role": "system", "content": "You are an expert social media manager for Fishtown Web Design. Do not mention having a local office, physical workspace, or in-person meetings - we are a fully remote company serving the Philadelphia area."},
                     {"role": "user", "content": prompt}
                 ],
+                model="gpt-4",
                 max_tokens=200,
                 temperature=0.7
             )
-            if (response and response.choices and len(response.choices) > 0 and response.choices[0].message and response.choices[0].message.content):
-                caption = response.choices[0].message.content.strip()
+            if caption:
+                caption = caption.strip()
                 # Remove leading/trailing quotes (single or double)
                 caption = caption.strip().strip('"').strip("'")
                 # Truncate if needed
@@ -367,4 +612,9 @@ class PostGenerator:
                 return None
         except Exception as e:
             print(f"Error generating blog caption with OpenAI: {e}")
-            return None 
\ No newline at end of file
+            return None
+
+@lru_cache(maxsize=1)
+def get_post_generator(client: OpenAI, holiday_lookup: Optional[Callable[[], Optional[Dict[str, Any]]]] = None) -> PostGenerator:
+    """Get the shared PostGenerator for a client; pass the same OpenAI client each time."""
+    return PostGenerator(client, holiday_lookup=holiday_lookup)
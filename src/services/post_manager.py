@@ -3,10 +3,87 @@ Post Manager module for handling post history, content similarity, and post pers
 Manages post storage, retrieval, and content uniqueness checking.
 """
 
-import json
 import os
-from typing import List, Dict, Any
+import re
+import atexit
+import threading
+from collections import deque, Counter
+from datetime import date
+from functools import lru_cache
+from typing import List, Dict, Any, FrozenSet, Optional
 from ..core.config import SIMILARITY_THRESHOLD, DATA_DIRECTORY
+from ..core.utils import json_loads, json_dumps
+
+# Number of most recent posts new content is compared against
+_SIMILARITY_WINDOW = 5
+
+# New posts are buffered and appended to the history file in batches of this size
+_FLUSH_EVERY = 16
+
+# Only this many of the most recent posts are kept in memory
+_HISTORY_TAIL = 32
+
+
+# Words for similarity, without the punctuation that whitespace splitting leaves attached
+_WORD = re.compile(r"[\w']+")
+
+
+def _tokens(content: str) -> FrozenSet[str]:
+    """Lowercased word set used for Jaccard similarity."""
+    return frozenset(_WORD.findall(content.lower()))
+
+
+def _read_jsonl(path: str) -> List[Dict[str, Any]]:
+    """Read one JSON object per line, skipping blank or truncated lines."""
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                try:
+                    records.append(json_loads(line))
+                except ValueError:
+                    print(f"Skipping unreadable line in {path}")
+    return records
+
+
+def _tail_jsonl(path: str, n: int, chunk_size: int = 8192) -> List[Dict[str, Any]]:
+    """Read the last n JSON lines of a file by scanning backwards from the end."""
+    if n <= 0:
+        return []
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b''
+        # n records need n + 1 newlines when the file ends with one
+        while pos > 0 and data.count(b'\n') <= n:
+            step = min(chunk_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    lines = data.splitlines()
+    if pos > 0:
+        # The first line was cut by the chunk boundary
+        lines = lines[1:]
+    records = []
+    for line in lines[-n:]:
+        if line.strip():
+            try:
+                records.append(json_loads(line))
+            except ValueError:
+                print(f"Skipping unreadable line in {path}")
+    return records
+
+
+def _write_jsonl(path: str, records: List[Dict[str, Any]], mode: str):
+    """Write (mode 'w') or append (mode 'a') records as one compact JSON object per line."""
+    with open(path, mode, encoding='utf-8') as f:
+        f.writelines(json_dumps(record) + '\n' for record in records)
+
+
+@lru_cache(maxsize=8)
+def _daily_posts_path(day: date) -> str:
+    """Daily posts file for a date, formatted once per day."""
+    return os.path.join(DATA_DIRECTORY, f"daily_posts_{day:%Y%m%d}.jsonl")
 
 
 class PostManager:
@@ -15,43 +92,109 @@ class PostManager:
     def __init__(self, history_file: str = None):
         # Use DATA_DIRECTORY for file paths
         if history_file is None:
-            history_file = os.path.join(DATA_DIRECTORY, 'post_history.json')
+            history_file = os.path.join(DATA_DIRECTORY, 'post_history.jsonl')
         else:
             history_file = os.path.join(DATA_DIRECTORY, history_file)
+        # History is stored one JSON post per line; ".json" names get the ".jsonl" sibling
+        if history_file.endswith('.json'):
+            history_file += 'l'
         
         self.history_file = history_file
+        # Create the data directories once rather than on every write
+        os.makedirs(DATA_DIRECTORY, exist_ok=True)
+        os.makedirs(os.path.dirname(history_file) or '.', exist_ok=True)
         self.post_history = self.load_post_history()
+        # Word sets of the most recent posts, so similarity checks don't re-tokenize them
+        self._recent_tokens = deque(
+            (_tokens(post['content']) for post in self.post_history[-_SIMILARITY_WINDOW:]),
+            maxlen=_SIMILARITY_WINDOW
+        )
+        # How many of those recent posts contain each word, for a quick no-match test
+        self._recent_word_counts = Counter(word for words in self._recent_tokens for word in words)
+        # Posts added since the last write; flushed in batches and at interpreter exit
+        self._pending: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
     
     def load_post_history(self) -> List[Dict[str, Any]]:
-        """Load previously generated posts to avoid repetition."""
+        """Load the most recent posts, enough to avoid repetition."""
         try:
-            with open(self.history_file, 'r') as f:
-                return json.load(f)
+            return _tail_jsonl(self.history_file, _HISTORY_TAIL)
+        except FileNotFoundError:
+            pass
+        
+        # One-time migration from the older whole-array JSON history file
+        legacy_file = self.history_file[:-1]
+        try:
+            with open(legacy_file, 'r') as f:
+                history = json_loads(f.read())
         except FileNotFoundError:
             return []
+        _write_jsonl(self.history_file, history, 'w')
+        print(f"Migrated post history from {legacy_file} to {self.history_file}")
+        return history[-_HISTORY_TAIL:]
+    
+    def load_all(self) -> List[Dict[str, Any]]:
+        """Load the complete post history, including posts not yet flushed."""
+        with self._lock:
+            try:
+                history = _read_jsonl(self.history_file)
+            except FileNotFoundError:
+                history = []
+            return history + self._pending
     
     def save_post_history(self):
-        """Save post history to file."""
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
-        with open(self.history_file, 'w') as f:
-            json.dump(self.post_history, f, indent=2)
+        """Save post history to file.
+        
+        Only the recent tail is held in memory, so this appends unsaved posts
+        rather than rewriting the file.
+        """
+        self.flush()
     
     def add_post(self, post: Dict[str, Any]):
-        """Add a new post to history and save."""
-        self.post_history.append(post)
-        self.save_post_history()
+        """Add a new post to history; it is written with the next batch flush."""
+        with self._lock:
+            self.post_history.append(post)
+            if len(self.post_history) > 2 * _HISTORY_TAIL:
+                del self.post_history[:-_HISTORY_TAIL]
+            self._remember_tokens(_tokens(post['content']))
+            self._pending.append(post)
+            if len(self._pending) >= _FLUSH_EVERY:
+                self._flush_locked()
+    
+    def _remember_tokens(self, words: FrozenSet[str]):
+        # Keep the word counts in step with the posts entering and leaving the window
+        if len(self._recent_tokens) == self._recent_tokens.maxlen:
+            self._recent_word_counts -= Counter(self._recent_tokens[0])
+        self._recent_tokens.append(words)
+        self._recent_word_counts.update(words)
+    
+    def flush(self):
+        """Append any buffered posts to the history file."""
+        with self._lock:
+            self._flush_locked()
+    
+    def _flush_locked(self):
+        # Append just the new posts instead of rewriting the whole history
+        if self._pending:
+            _write_jsonl(self.history_file, self._pending, 'a')
+            self._pending.clear()
     
     def is_content_similar(self, new_content: str) -> bool:
         """Check if new content is too similar to recent posts."""
-        if len(self.post_history) < 5:
+        if len(self.post_history) < _SIMILARITY_WINDOW:
             return False
         
-        recent_posts = self.post_history[-5:]
-        new_words = set(new_content.lower().split())
+        new_words = _tokens(new_content)
         
-        for post in recent_posts:
-            existing_words = set(post['content'].lower().split())
+        # No recent post can share more words than all of them together, so when even
+        # that overlap is under the threshold, skip the per-post Jaccard comparisons
+        recent_counts = self._recent_word_counts
+        shared = sum(1 for word in new_words if word in recent_counts)
+        if not new_words or shared / len(new_words) <= SIMILARITY_THRESHOLD:
+            return False
+        
+        for existing_words in self._recent_tokens:
             similarity = len(new_words.intersection(existing_words)) / len(new_words.union(existing_words))
             if similarity > SIMILARITY_THRESHOLD:  # 30% similarity threshold
                 return True
@@ -64,23 +207,17 @@ class PostManager:
     
     def save_daily_post(self, post: Dict[str, Any]):
         """Save current post to daily file."""
-        from datetime import datetime
+        daily_filepath = _daily_posts_path(date.today())
         
-        daily_filename = f"daily_posts_{datetime.now().strftime('%Y%m%d')}.json"
-        daily_filepath = os.path.join(DATA_DIRECTORY, daily_filename)
-        
-        # Ensure directory exists
-        os.makedirs(DATA_DIRECTORY, exist_ok=True)
+        # Append the post as one line; earlier posts of the day are left untouched
+        _write_jsonl(daily_filepath, [post], 'a')
         
+        return daily_filepath
+    
+    def get_todays_post(self) -> Optional[Dict[str, Any]]:
+        """Most recent post saved to today's daily file, or None if there is none yet."""
         try:
-            with open(daily_filepath, 'r') as f:
-                daily_posts = json.load(f)
+            posts = _tail_jsonl(_daily_posts_path(date.today()), 1)
         except FileNotFoundError:
-            daily_posts = []
-        
-        daily_posts.append(post)
-        
-        with open(daily_filepath, 'w') as f:
-            json.dump(daily_posts, f, indent=2)
-        
-        return daily_filepath 
\ No newline at end of file
+            return None
+        return posts[0] if posts else None 
\ No newline at end of file
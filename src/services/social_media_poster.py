@@ -4,31 +4,40 @@ Fishtown Web Design Autonomous Social Media Poster
 Automatically posts generated content to Facebook and Instagram
 """
 
+import io
 import os
-import json
 import time
-import requests
+import queue
+import gzip
+import atexit
+import shutil
 import hashlib
-from datetime import datetime
-from typing import Dict, Any, Optional
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple, TYPE_CHECKING
 import logging
-from ..core.utils import load_environment, check_social_media_credentials, validate_setup
-from ..core.config import DATA_DIRECTORY, IMAGES_DIRECTORY
+from ..core.utils import load_environment, check_social_media_credentials, validate_setup, json_loads, json_dumps, json_dumpb, resolve_image_path
+from ..core.config import DATA_DIRECTORY, LOGS_PATH
+
+if TYPE_CHECKING:
+    import requests
+    from requests.adapters import HTTPAdapter
 
 # Configure logging
 import sys
 
 # Create handlers
-file_handler = logging.FileHandler(os.path.join('data', 'logs', 'social_media.log'), encoding='utf-8')
+file_handler = logging.FileHandler(LOGS_PATH / 'social_media.log', encoding='utf-8')
 console_handler = logging.StreamHandler(sys.stdout)
 
 # Set encoding for console handler to handle Unicode on Windows
 if sys.platform == 'win32':
     # On Windows, use utf-8 encoding for console output
     console_handler.setStream(sys.stdout)
-    # Force UTF-8 encoding for the console
-    if hasattr(sys.stdout, 'reconfigure'):
-        sys.stdout.reconfigure(encoding='utf-8')
+    # UTF-8 console encoding is handled once by core.utils
 
 logging.basicConfig(
     level=logging.INFO,
@@ -37,20 +46,282 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def resolve_image_path(image_path: str) -> str:
-    """Resolve image path to the correct directory."""
-    if not image_path:
-        return image_path
+# Images are hashed in chunks of this size so the whole file is never held in memory
+_HASH_CHUNK_SIZE = 1 << 20
+
+# Graph API error code / subcode that mark a rejected duplicate post
+_DUPLICATE_ERROR_CODE = 506
+_DUPLICATE_ERROR_SUBCODE = 1609005
+
+# Page access tokens are reused for this long before being fetched again
+_PAGE_TOKEN_TTL = 55 * 60
+
+# Upload tracking: a compacted snapshot plus an append-only log of uploads since then
+UPLOADED_IMAGES_FILENAME = 'uploaded_images.json'
+UPLOADED_IMAGES_LOG_FILENAME = 'uploaded_images.log'
+
+# Posting results, one JSON entry per line; older installs kept a single JSON array
+POSTING_LOG_FILENAME = 'posting_log.jsonl'
+LEGACY_POSTING_LOG_FILENAME = 'posting_log.json'
+
+# Posting log entries are written in batches of up to this many, after at most this long
+_LOG_BATCH_SIZE = 64
+_LOG_BATCH_WAIT = 0.5
+_LOG_QUEUE_SIZE = 1024
+
+# Longer post text and platform errors (often a whole HTTP error body) are cut short in the log
+_LOG_CONTENT_MAX_CHARS = 10_000
+_LOG_ERROR_MAX_CHARS = 500
+
+# Past this size the posting log is moved aside and compressed, and a new one is started
+_LOG_ROTATE_SIZE = 10 * 1024 * 1024
+
+@lru_cache(maxsize=1)
+def _graph_retry_class():
+    """Retry policy for the Graph API that only repeats a POST when it was not processed."""
+    from urllib3.util.retry import Retry
+    
+    class _GraphRetry(Retry):
+        def is_retry(self, method, status_code, has_retry_after=False):
+            # Any other error on a POST may already have published the post
+            if method == 'POST' and status_code not in (429, 503):
+                return False
+            return super().is_retry(method, status_code, has_retry_after)
+        
+        def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+            # A read error or timeout on a POST can arrive after the post was published,
+            # so only connection errors (request never sent) are retried
+            if method == 'POST' and error is not None and self._is_read_error(error):
+                return Retry.increment(self.new(read=False), method, url, response, error, _pool, _stacktrace)
+            return super().increment(method, url, response, error, _pool, _stacktrace)
+    
+    return _GraphRetry
+
+def _graph_adapter() -> 'HTTPAdapter':
+    """Adapter for graph.facebook.com that retries a POST only when it can't have been processed."""
+    from requests.adapters import HTTPAdapter
+    retry = _graph_retry_class()(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET", "POST"]
+    )
+    return HTTPAdapter(max_retries=retry, pool_connections=4, pool_maxsize=8)
+
+def _graph_session() -> 'requests.Session':
+    """A new session whose graph.facebook.com requests go through the Graph API adapter."""
+    import requests
+    session = requests.Session()
+    session.mount("https://graph.facebook.com", _graph_adapter())
+    return session
+
+def _is_duplicate_error(response) -> bool:
+    """Whether a Graph API error response rejects the post as a duplicate."""
+    try:
+        error = response.json().get('error') or {}
+    except (ValueError, AttributeError):
+        return False
+    code, subcode = error.get('code'), error.get('error_subcode')
+    logger.info(f"Facebook error code {code}, subcode {subcode}")
+    if code == _DUPLICATE_ERROR_CODE or subcode == _DUPLICATE_ERROR_SUBCODE:
+        return True
+    # Photo duplicates don't always carry a dedicated code; the message is short to scan
+    return 'duplicate' in (error.get('message') or '').lower()
+
+def _new_image_digest():
+    """Fast 128-bit digest for duplicate detection; older MD5 keys simply age out."""
+    return hashlib.blake2b(digest_size=16, usedforsecurity=False)
+
+class _HashingReader:
+    """Image file wrapper that hashes the bytes as requests reads them for upload."""
+    
+    def __init__(self, fp):
+        self.fp = fp
+        self.digest = _new_image_digest()
+    
+    def read(self, size=-1):
+        data = self.fp.read(size)
+        self.digest.update(data)
+        return data
+
+class _PostingLogWriter:
+    """Background writer that appends queued posting-log entries in fsynced batches."""
+    
+    _STOP = object()
+    
+    def __init__(self, path: str):
+        self.path = path
+        # Bounded, so a stalled disk slows posters down instead of growing without limit
+        self._queue: queue.Queue = queue.Queue(maxsize=_LOG_QUEUE_SIZE)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        # Append-mode file kept open by the writer thread across batches
+        self._fp = None
+        atexit.register(self.close)
+    
+    def submit(self, entry: Dict[str, Any]):
+        """Queue an entry for the writer thread, starting it on first use."""
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='posting-log-writer', daemon=True)
+                self._thread.start()
+        self._queue.put(entry)
+    
+    def close(self):
+        """Write any queued entries, stop the writer thread and close the file."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
     
-    # If the path starts with generated_images/, look in the IMAGES_DIRECTORY
-    if image_path.startswith('generated_images/'):
-        filename = os.path.basename(image_path)
-        return os.path.join(IMAGES_DIRECTORY, filename)
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            # Coalesce whatever arrives within the wait window into the same write
+            deadline = time.monotonic() + _LOG_BATCH_WAIT
+            while len(batch) < _LOG_BATCH_SIZE and batch[-1] is not self._STOP:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            entries = [entry for entry in batch if entry is not self._STOP]
+            stopping = len(entries) != len(batch)
+            try:
+                if entries:
+                    self._write(entries)
+            except Exception as e:
+                logger.error(f"Error writing posting log: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+    
+    def _write(self, entries):
+        if self._fp is None:
+            # Opened once; O_APPEND keeps each write at the end even with other writers
+            self._fp = open(self.path, 'ab')
+        try:
+            # Bytes go straight to the file, with no str round trip
+            self._fp.write(b''.join(json_dumpb(entry) + b'\n' for entry in entries))
+            self._fp.flush()
+            os.fsync(self._fp.fileno())
+        except OSError:
+            # Reopen on the next batch rather than keep writing to a broken handle
+            self._fp.close()
+            self._fp = None
+            raise
+        if self._fp.tell() > _LOG_ROTATE_SIZE:
+            self._rotate()
     
-    return image_path
+    def _rotate(self):
+        self._fp.close()
+        self._fp = None
+        root, ext = os.path.splitext(self.path)
+        segment = f"{root}.{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}{ext}"
+        os.replace(self.path, segment)
+        _compress_log_segment(segment)
+        logger.info(f"Rotated posting log to {segment}")
+
+def read_posting_log(path: str, include_archived: bool = False) -> List[Dict[str, Any]]:
+    """Entries in a posting log, oldest first.
+    
+    Rotated segments are only decompressed when include_archived is set.
+    """
+    paths = []
+    if include_archived:
+        root, ext = os.path.splitext(path)
+        directory, prefix = os.path.split(root)
+        paths = [
+            os.path.join(directory, name) for name in sorted(os.listdir(directory or '.'))
+            if name.startswith(prefix + '.') and name != prefix + ext
+            and name.endswith((ext, ext + '.zst', ext + '.gz'))
+        ]
+    # The log is only ever appended to, so a missing file just means nothing was logged yet
+    if os.path.exists(path):
+        paths.append(path)
+    entries = []
+    for segment in paths:
+        with _open_log_segment(segment) as f:
+            entries.extend(_parse_log_lines(f, segment))
+    return entries
+
+def _parse_log_lines(f, path: str):
+    """Yield the entries in a binary posting-log stream, skipping unreadable lines."""
+    # Retries log the same post text again; keep one string per distinct content
+    contents: Dict[str, str] = {}
+    for line in f:
+        if line.strip():
+            try:
+                entry = json_loads(line)
+                if not isinstance(entry, dict):
+                    raise ValueError("not an object")
+            except ValueError:
+                logger.warning(f"Skipping unreadable line in {path}")
+                continue
+            # Every entry has the same few keys; share one string object per key
+            entry = {sys.intern(key): value for key, value in entry.items()}
+            content = entry.get('content')
+            if isinstance(content, str):
+                entry['content'] = contents.setdefault(content, content)
+            yield entry
+
+def _truncate_for_log(text: Any, limit: int) -> Any:
+    """Cut a long string down to limit characters, marking how much was dropped."""
+    if not isinstance(text, str) or len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [truncated {len(text) - limit} chars]"
+
+def _results_for_log(results: Dict[str, Any]) -> Dict[str, Any]:
+    """Posting results with each platform's error shortened; the caller's dicts are left alone."""
+    platforms = {
+        name: {**result, 'error': _truncate_for_log(result['error'], _LOG_ERROR_MAX_CHARS)}
+        if isinstance(result, dict) and 'error' in result else result
+        for name, result in results.get('platforms', {}).items()
+    }
+    return {**results, 'platforms': platforms}
+
+def _compress_log_segment(path: str):
+    """Compress a rotated log segment with zstd, or gzip when zstandard isn't installed."""
+    try:
+        import zstandard
+    except ImportError:
+        zstandard = None
+    compressed_path = path + ('.zst' if zstandard is not None else '.gz')
+    tmp_path = f"{compressed_path}.tmp"
+    with open(path, 'rb') as src, open(tmp_path, 'wb') as dst:
+        if zstandard is not None:
+            zstandard.ZstdCompressor(level=3).copy_stream(src, dst)
+        else:
+            with gzip.GzipFile(fileobj=dst, mode='wb', compresslevel=6) as gz:
+                shutil.copyfileobj(src, gz)
+        dst.flush()
+        os.fsync(dst.fileno())
+    os.replace(tmp_path, compressed_path)
+    os.remove(path)
+
+def _open_log_segment(path: str):
+    """Open a posting log or rotated segment for reading as decompressed bytes."""
+    if path.endswith('.zst'):
+        import zstandard
+        # The raw stream reader has no readline, so buffer it for line-by-line iteration
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True))
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    # The current log, or a segment left uncompressed if compression failed
+    return open(path, 'rb')
+
+@lru_cache(maxsize=None)
+def _posting_log_writer(path: str) -> _PostingLogWriter:
+    """The single writer for a posting log file."""
+    return _PostingLogWriter(path)
 
 class AutonomousSocialMediaPoster:
-    def __init__(self):
+    def __init__(self, session: Optional['requests.Session'] = None):
         """Initialize the autonomous social media poster."""
         # Load environment using shared utility
         load_environment()
@@ -68,20 +339,41 @@ class AutonomousSocialMediaPoster:
         # Check if Instagram is configured (requires both Facebook access token and Instagram business account ID)
         self.instagram_enabled = credentials['instagram_enabled']
         
+        # Result of a page access check performed ahead of posting
+        self._page_info: Optional[Dict[str, Any]] = None
+        
+        # Page access token and the time it was fetched; cleared when Facebook rejects it
+        self._page_token_cache: Optional[Tuple[str, float]] = None
+        self._page_headers: Optional[Tuple[str, Dict[str, str]]] = None
+        # Successful page/Instagram account checks; these don't change for the process lifetime
+        self._page_access: Optional[Dict[str, Any]] = None
+        self._instagram_access: Optional[Dict[str, Any]] = None
+        
+        # Image hashes by (path, mtime, size), so each file is read at most once while unchanged
+        self._hash_cache: Dict[Tuple[str, int, int], str] = {}
+        # Image stats taken during the current post_autonomously call, so each file is stat'ed once
+        self._image_stats: Dict[str, Optional[os.stat_result]] = {}
+        # Posting log location, with its directory created once up front rather than per post
+        os.makedirs(DATA_DIRECTORY, exist_ok=True)
+        self._posting_log_path = os.path.join(DATA_DIRECTORY, POSTING_LOG_FILENAME)
+        # Set once the legacy posting log has been checked for, so appends skip the stats
+        self._posting_log_migrated = False
+        
         if not self.facebook_enabled and not self.instagram_enabled:
             logger.warning("No social media credentials configured - posting disabled")
             return
         
         self.base_url = "https://graph.facebook.com/v18.0"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'Authorization': f'Bearer {self.access_token}',
-            'Content-Type': 'application/json'
-        })
+        # Auth headers are sent per request, so a caller's session can be used as is; without
+        # one, Graph API calls get a poster-owned session with their own pool and POST-aware
+        # retries, leaving the process-wide session from get_http_session() untouched
+        self.session = session or _graph_session()
+        self._auth_headers = {'Authorization': f'Bearer {self.access_token}'}
         
         # Rate limiting
         self.last_post_time = 0
         self.min_post_interval = 60  # Minimum 60 seconds between posts
+        self._rate_limit_lock = threading.Lock()
         
         # Track uploaded images to prevent duplicates
         self.uploaded_images: Dict[str, Dict[str, str]] = self.load_uploaded_images()
@@ -93,34 +385,97 @@ class AutonomousSocialMediaPoster:
     
     def load_uploaded_images(self) -> Dict[str, Dict[str, str]]:
         """Load previously uploaded image hashes to prevent duplicates."""
-        uploaded_images_path = os.path.join(DATA_DIRECTORY, 'uploaded_images.json')
+        uploaded_images_path = os.path.join(DATA_DIRECTORY, UPLOADED_IMAGES_FILENAME)
+        try:
+            with open(uploaded_images_path, 'r', encoding='utf-8') as f:
+                uploaded_images = json_loads(f.read())
+        except FileNotFoundError:
+            uploaded_images = {}
+        
+        # Replay uploads recorded since the snapshot was last compacted
         try:
-            with open(uploaded_images_path, 'r') as f:
-                return json.load(f)
+            with open(os.path.join(DATA_DIRECTORY, UPLOADED_IMAGES_LOG_FILENAME), 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json_loads(line)
+                        uploaded_images[entry.pop('hash')] = entry
+                    except (ValueError, KeyError, AttributeError):
+                        continue
         except FileNotFoundError:
-            return {}
+            pass
+        return uploaded_images
     
     def save_uploaded_images(self):
-        """Save uploaded image hashes to file."""
-        uploaded_images_path = os.path.join(DATA_DIRECTORY, 'uploaded_images.json')
+        """Save uploaded image hashes to file, folding in the upload log."""
+        uploaded_images_path = os.path.join(DATA_DIRECTORY, UPLOADED_IMAGES_FILENAME)
         # Ensure directory exists
         os.makedirs(DATA_DIRECTORY, exist_ok=True)
-        with open(uploaded_images_path, 'w') as f:
-            json.dump(self.uploaded_images, f, indent=2)
+        tmp_path = f"{uploaded_images_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json_dumps(self.uploaded_images))
+            # Durable before the rename, so a crash leaves either the old or the new snapshot
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, uploaded_images_path)
+        # The snapshot now holds every logged upload
+        try:
+            os.remove(os.path.join(DATA_DIRECTORY, UPLOADED_IMAGES_LOG_FILENAME))
+        except FileNotFoundError:
+            pass
+    
+    def _append_upload_log(self, image_hash: str, entry: Dict[str, str]):
+        """Record one upload as a line in the upload log instead of rewriting the snapshot."""
+        os.makedirs(DATA_DIRECTORY, exist_ok=True)
+        with open(os.path.join(DATA_DIRECTORY, UPLOADED_IMAGES_LOG_FILENAME), 'a', encoding='utf-8') as f:
+            f.write(json_dumps({'hash': image_hash, **entry}) + '\n')
+    
+    def _stat_image(self, image_path: str) -> Optional[os.stat_result]:
+        """Stat an image once per post; None when it doesn't exist."""
+        if image_path in self._image_stats:
+            return self._image_stats[image_path]
+        try:
+            st = os.stat(image_path)
+        except OSError:
+            st = None
+        self._image_stats[image_path] = st
+        return st
     
     def get_image_hash(self, image_path: str) -> str:
         """Generate a hash for an image file to detect duplicates."""
         try:
+            st = self._stat_image(image_path)
+            if st is None:
+                raise FileNotFoundError(f"Image not found: {image_path}")
+            key = (image_path, st.st_mtime_ns, st.st_size)
+            cached = self._hash_cache.get(key)
+            if cached is not None:
+                return cached
             with open(image_path, 'rb') as f:
-                return hashlib.md5(f.read()).hexdigest()
+                if hasattr(hashlib, 'file_digest'):
+                    image_hash = hashlib.file_digest(f, _new_image_digest).hexdigest()
+                else:
+                    digest = _new_image_digest()
+                    for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+                        digest.update(chunk)
+                    image_hash = digest.hexdigest()
+            self._hash_cache[key] = image_hash
+            return image_hash
         except Exception as e:
             logger.error(f"Error generating image hash: {e}")
             return ""
     
+    def _remember_upload_hash(self, image_path: str, image_file, source: '_HashingReader'):
+        """Cache the hash computed during an upload so marking the image doesn't re-read it."""
+        # requests reads the whole file for a multipart body; anything less isn't a full hash
+        st = os.fstat(image_file.fileno())
+        if image_file.tell() != st.st_size:
+            return
+        self._hash_cache[(image_path, st.st_mtime_ns, st.st_size)] = source.digest.hexdigest()
+    
     def is_image_already_uploaded(self, image_path: str) -> bool:
         """Check if an image has already been uploaded to Facebook."""
         resolved_path = resolve_image_path(image_path)
-        if not image_path or not os.path.exists(resolved_path):
+        if not image_path or self._stat_image(resolved_path) is None:
             return False
         
         image_hash = self.get_image_hash(resolved_path)
@@ -129,44 +484,66 @@ class AutonomousSocialMediaPoster:
     def mark_image_as_uploaded(self, image_path: str, media_id: str):
         """Mark an image as uploaded to prevent future duplicates."""
         resolved_path = resolve_image_path(image_path)
-        if not image_path or not os.path.exists(resolved_path):
+        if not image_path or self._stat_image(resolved_path) is None:
             return
         
         image_hash = self.get_image_hash(resolved_path)
         if image_hash:
-            self.uploaded_images[image_hash] = {
+            entry = {
                 'media_id': media_id,
                 'uploaded_at': datetime.now().isoformat(),
                 'image_path': image_path
             }
-            self.save_uploaded_images()
+            self.uploaded_images[image_hash] = entry
+            self._append_upload_log(image_hash, entry)
     
     def cleanup_old_uploads(self, days_old: int = 7):
         """Clean up old upload tracking data to prevent issues with similar images."""
         try:
-            cutoff_date = datetime.now().timestamp() - (days_old * 24 * 60 * 60)
-            cleaned_count = 0
+            # uploaded_at values are naive ISO-8601 strings, which sort chronologically
+            cutoff_iso = (datetime.now() - timedelta(days=days_old)).isoformat()
+            expired = []
             
-            for hash_key, data in list(self.uploaded_images.items()):
+            for hash_key, data in self.uploaded_images.items():
                 try:
-                    upload_time = datetime.fromisoformat(data['uploaded_at']).timestamp()
-                    if upload_time < cutoff_date:
-                        del self.uploaded_images[hash_key]
-                        cleaned_count += 1
-                except (ValueError, KeyError):
+                    if data['uploaded_at'] < cutoff_iso:
+                        expired.append(hash_key)
+                except (TypeError, KeyError):
                     # Remove invalid entries
-                    del self.uploaded_images[hash_key]
-                    cleaned_count += 1
+                    expired.append(hash_key)
             
-            if cleaned_count > 0:
+            for hash_key in expired:
+                del self.uploaded_images[hash_key]
+            cleaned_count = len(expired)
+            
+            # Compact the upload log into the snapshot while rewriting it anyway
+            if cleaned_count > 0 or os.path.exists(os.path.join(DATA_DIRECTORY, UPLOADED_IMAGES_LOG_FILENAME)):
                 self.save_uploaded_images()
+            if cleaned_count > 0:
                 logger.info(f"Cleaned up {cleaned_count} old upload tracking entries")
                 
         except Exception as e:
             logger.error(f"Error cleaning up old uploads: {e}")
     
-    def post_autonomously(self, post_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Automatically post content to Facebook and Instagram."""
+    def prepare_facebook_post(self) -> Dict[str, Any]:
+        """Verify page access ahead of posting so it can overlap other work."""
+        self._page_info = self._verify_page_and_get_token()
+        return self._page_info
+    
+    def post_autonomously(self, post_data: Dict[str, Any], parallel: bool = True) -> Dict[str, Any]:
+        """Automatically post content to Facebook and Instagram.
+        
+        With parallel=True both platforms are posted to at once, and Instagram
+        uploads its own copy of the image instead of reusing the Facebook photo.
+        """
+        # Image stats are only trusted for the duration of one post
+        self._image_stats.clear()
+        try:
+            return self._post_autonomously(post_data, parallel)
+        finally:
+            self._image_stats.clear()
+    
+    def _post_autonomously(self, post_data: Dict[str, Any], parallel: bool) -> Dict[str, Any]:
         results = {
             'timestamp': datetime.now().isoformat(),
             'platforms': {},
@@ -181,9 +558,19 @@ class AutonomousSocialMediaPoster:
         if image_path:
             logger.info(f"Image: {image_path}")
         
+        # Facebook and Instagram are independent when Instagram doesn't reuse the Facebook photo
+        fb_result = ig_result = None
+        if parallel and self.facebook_enabled and self.instagram_enabled:
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                fb_future = pool.submit(self._post_to_facebook, content, image_path)
+                ig_future = pool.submit(self._post_to_instagram, content, image_path, None)
+                fb_result = fb_future.result()
+                ig_result = ig_future.result()
+        
         # Post to Facebook if enabled
         if self.facebook_enabled:
-            fb_result = self._post_to_facebook(content, image_path)
+            if fb_result is None:
+                fb_result = self._post_to_facebook(content, image_path)
             results['platforms']['facebook'] = fb_result
             
             if fb_result.get('success'):
@@ -203,14 +590,15 @@ class AutonomousSocialMediaPoster:
         
         # Post to Instagram if enabled
         if self.instagram_enabled:
-            # Get Facebook post ID if Facebook posting was successful and had an image
-            facebook_post_id = None
-            if (self.facebook_enabled and 
-                results['platforms'].get('facebook', {}).get('success') and 
-                results['platforms']['facebook'].get('has_image')):
-                facebook_post_id = results['platforms']['facebook'].get('post_id')
-            
-            ig_result = self._post_to_instagram(content, image_path, facebook_post_id)
+            if ig_result is None:
+                # Get Facebook post ID if Facebook posting was successful and had an image
+                facebook_post_id = None
+                if (self.facebook_enabled and 
+                    results['platforms'].get('facebook', {}).get('success') and 
+                    results['platforms']['facebook'].get('has_image')):
+                    facebook_post_id = results['platforms']['facebook'].get('post_id')
+                
+                ig_result = self._post_to_instagram(content, image_path, facebook_post_id)
             results['platforms']['instagram'] = ig_result
             
             if ig_result.get('success'):
@@ -250,13 +638,15 @@ class AutonomousSocialMediaPoster:
         try:
             self._respect_rate_limits()
             
-            # First, verify we can access the page
-            page_info = self._verify_page_access()
+            # First, verify we can access the page (reuse an earlier successful check)
+            page_info = self._page_info
+            if not page_info or not page_info.get('success'):
+                page_info = self._verify_page_and_get_token()
             if not page_info.get('success'):
                 return page_info
             
-            # Get page access token
-            page_access_token = self._get_page_access_token()
+            # Get page access token (usually already fetched in the same batch)
+            page_access_token = page_info.get('access_token') or self._get_page_access_token()
             if not page_access_token:
                 return {
                     'success': False,
@@ -264,13 +654,18 @@ class AutonomousSocialMediaPoster:
                     'platform': 'facebook'
                 }
             
-            # If we have an image, post as a photo with caption
+            # If we have an image, post as a photo with caption, otherwise as text-only status
             resolved_image_path = resolve_image_path(image_path)
-            if image_path and os.path.exists(resolved_image_path):
-                return self._post_photo_with_caption(content, resolved_image_path, page_access_token)
-            else:
-                # Post as text-only status
-                return self._post_text_only(content, page_access_token)
+            has_image = bool(image_path) and self._stat_image(resolved_image_path) is not None
+            result = self._post_facebook_content(content, resolved_image_path if has_image else None, page_access_token)
+            
+            # A rejected (cached) page token is fetched again and the post retried once
+            if result.pop('token_rejected', False):
+                page_access_token = self._get_page_access_token()
+                if page_access_token:
+                    result = self._post_facebook_content(content, resolved_image_path if has_image else None, page_access_token)
+                    result.pop('token_rejected', None)
+            return result
         
         except Exception as e:
             logger.error(f"Error posting to Facebook: {e}")
@@ -280,21 +675,37 @@ class AutonomousSocialMediaPoster:
                 'platform': 'facebook'
             }
     
+    def _post_facebook_content(self, content: str, image_path: Optional[str], page_access_token: str) -> Dict[str, Any]:
+        """Post a photo with caption when an image path is given, otherwise a text-only status."""
+        if image_path:
+            return self._post_photo_with_caption(content, image_path, page_access_token)
+        return self._post_text_only(content, page_access_token)
+    
+    def _reject_page_token(self, response) -> bool:
+        """Forget the cached page token if Facebook refused it; True when it did."""
+        if response.status_code in (401, 403):
+            logger.warning("Page access token was rejected - it will be fetched again")
+            self._page_token_cache = None
+            self._page_info = None
+            return True
+        return False
+    
     def _post_photo_with_caption(self, content: str, image_path: str, page_access_token: str) -> Dict[str, Any]:
         """Post a photo with caption using the /photos endpoint."""
         try:
             with open(image_path, 'rb') as image_file:
-                files = {'source': image_file}
-                data = {
-                    'message': content,
-                    'access_token': page_access_token
-                }
+                source = _HashingReader(image_file)
+                files = {'source': (os.path.basename(image_path), source)}
+                data = {'message': content}
                 
-                response = requests.post(
+                # The page token travels in a header rather than as another multipart field
+                response = self.session.post(
                     f"{self.base_url}/{self.page_id}/photos",
                     files=files,
-                    data=data
+                    data=data,
+                    headers=self._page_auth_headers(page_access_token)
                 )
+                self._remember_upload_hash(image_path, image_file, source)
             
             if response.status_code == 200:
                 result = response.json()
@@ -311,7 +722,7 @@ class AutonomousSocialMediaPoster:
                     'platform': 'facebook',
                     'has_image': True
                 }
-            elif response.status_code == 400 and "duplicate" in response.text.lower():
+            elif response.status_code == 400 and _is_duplicate_error(response):
                 logger.warning(f"Facebook detected duplicate image: {image_path}")
                 # Mark as uploaded to prevent future attempts
                 self.mark_image_as_uploaded(image_path, "duplicate_detected")
@@ -323,7 +734,8 @@ class AutonomousSocialMediaPoster:
                 return {
                     'success': False,
                     'error': error_msg,
-                    'platform': 'facebook'
+                    'platform': 'facebook',
+                    'token_rejected': self._reject_page_token(response)
                 }
         
         except Exception as e:
@@ -344,7 +756,8 @@ class AutonomousSocialMediaPoster:
             
             response = self.session.post(
                 f"{self.base_url}/{self.page_id}/feed",
-                data=post_data
+                data=post_data,
+                headers=self._auth_headers
             )
             
             if response.status_code == 200:
@@ -365,7 +778,8 @@ class AutonomousSocialMediaPoster:
                 return {
                     'success': False,
                     'error': error_msg,
-                    'platform': 'facebook'
+                    'platform': 'facebook',
+                    'token_rejected': self._reject_page_token(response)
                 }
         
         except Exception as e:
@@ -378,20 +792,24 @@ class AutonomousSocialMediaPoster:
     
     def _verify_page_access(self) -> Dict[str, Any]:
         """Verify that we can access the specified page."""
+        if self._page_access is not None:
+            return dict(self._page_access)
         try:
             response = self.session.get(
                 f"{self.base_url}/{self.page_id}",
-                params={'fields': 'id,name,category'}
+                params={'fields': 'id,name,category'},
+                headers=self._auth_headers
             )
             
             if response.status_code == 200:
                 data = response.json()
                 logger.info(f"Page access verified: {data.get('name', 'Unknown')}")
-                return {
+                self._page_access = {
                     'success': True,
                     'page_name': data.get('name'),
                     'page_category': data.get('category')
                 }
+                return dict(self._page_access)
             else:
                 error_msg = f"Page access failed: {response.status_code} - {response.text}"
                 logger.error(f"{error_msg}")
@@ -412,12 +830,77 @@ class AutonomousSocialMediaPoster:
                 'error': f"Error verifying page access: {e}"
             }
     
+    def _verify_page_and_get_token(self) -> Dict[str, Any]:
+        """Verify page access and fetch the page access token in one Graph batch request."""
+        try:
+            batch = [
+                {'method': 'GET', 'relative_url': f"{self.page_id}?fields=id,name,category"},
+                {'method': 'GET', 'relative_url': f"{self.page_id}?fields=access_token"}
+            ]
+            response = self.session.post(self.base_url, json={'batch': batch}, headers=self._auth_headers)
+            
+            if response.status_code == 200:
+                page_result, token_result = response.json()
+                if page_result and page_result.get('code') == 200:
+                    data = json_loads(page_result['body'])
+                    logger.info(f"Page access verified: {data.get('name', 'Unknown')}")
+                    
+                    self._page_access = {
+                        'success': True,
+                        'page_name': data.get('name'),
+                        'page_category': data.get('category')
+                    }
+                    
+                    page_token = None
+                    if token_result and token_result.get('code') == 200:
+                        page_token = json_loads(token_result['body']).get('access_token')
+                        if page_token:
+                            logger.info("Retrieved page access token")
+                            self._page_token_cache = (page_token, time.time())
+                    
+                    return {
+                        'success': True,
+                        'page_name': data.get('name'),
+                        'page_category': data.get('category'),
+                        'access_token': page_token
+                    }
+            
+            logger.warning("Batched page verification failed, retrying with individual requests")
+        
+        except Exception as e:
+            logger.warning(f"Error in batched page verification: {e}")
+        
+        # Fall back to the individual calls, which also produce detailed error messages
+        page_info = self._verify_page_access()
+        if page_info.get('success'):
+            page_info['access_token'] = self._get_page_access_token()
+        return page_info
+    
+    def _page_auth_headers(self, page_access_token: str) -> Dict[str, str]:
+        """Authorization header for a page token, built once per token."""
+        cached = self._page_headers
+        if cached is None or cached[0] != page_access_token:
+            cached = self._page_headers = (page_access_token, {'Authorization': f'Bearer {page_access_token}'})
+        return cached[1]
+    
+    def _cached_page_token(self) -> Optional[str]:
+        """The cached page access token, if it is still within its TTL."""
+        if self._page_token_cache is not None:
+            page_token, fetched_at = self._page_token_cache
+            if time.time() - fetched_at < _PAGE_TOKEN_TTL:
+                return page_token
+        return None
+    
     def _get_page_access_token(self) -> Optional[str]:
-        """Get the page-specific access token."""
+        """Get the page-specific access token, reusing a recently fetched one."""
+        page_token = self._cached_page_token()
+        if page_token:
+            return page_token
         try:
             response = self.session.get(
                 f"{self.base_url}/{self.page_id}",
-                params={'fields': 'access_token'}
+                params={'fields': 'access_token'},
+                headers=self._auth_headers
             )
             
             if response.status_code == 200:
@@ -425,6 +908,7 @@ class AutonomousSocialMediaPoster:
                 page_token = data.get('access_token')
                 if page_token:
                     logger.info("Retrieved page access token")
+                    self._page_token_cache = (page_token, time.time())
                     return page_token
                 else:
                     logger.error("No page access token in response")
@@ -440,22 +924,22 @@ class AutonomousSocialMediaPoster:
     def _post_to_instagram(self, content: str, image_path: Optional[str] = None, facebook_post_id: Optional[str] = None) -> Dict[str, Any]:
         """Post to Instagram Business Account."""
         try:
-            self._respect_rate_limits()
-            
-            # Verify Instagram business account access
-            ig_info = self._verify_instagram_access()
-            if not ig_info.get('success'):
-                return ig_info
-            
-            # Instagram requires images for posts, so if no image, we can't post
+            # Instagram requires images for posts, so if no image, skip before any API calls
             resolved_image_path = resolve_image_path(image_path)
-            if not image_path or not os.path.exists(resolved_image_path):
+            if not image_path or self._stat_image(resolved_image_path) is None:
                 return {
                     'success': False,
                     'error': 'Instagram requires an image for posts. No image provided.',
                     'platform': 'instagram'
                 }
             
+            self._respect_rate_limits()
+            
+            # Verify Instagram business account access (fetching the page token alongside)
+            ig_info = self._verify_instagram_and_get_token()
+            if not ig_info.get('success'):
+                return ig_info
+            
             # Post photo to Instagram
             return self._post_photo_to_instagram(content, resolved_image_path, facebook_post_id)
         
@@ -467,22 +951,64 @@ class AutonomousSocialMediaPoster:
                 'platform': 'instagram'
             }
     
+    def _verify_instagram_and_get_token(self) -> Dict[str, Any]:
+        """Verify Instagram access and fetch the page access token in one Graph batch request."""
+        # With either one already cached, only the other needs a request
+        if self._instagram_access is not None or self._cached_page_token():
+            return self._verify_instagram_access()
+        try:
+            batch = [
+                {'method': 'GET', 'relative_url': f"{self.instagram_business_account_id}?fields=id,username,media_count"},
+                {'method': 'GET', 'relative_url': f"{self.page_id}?fields=access_token"}
+            ]
+            response = self.session.post(self.base_url, json={'batch': batch}, headers=self._auth_headers)
+            
+            if response.status_code == 200:
+                ig_result, token_result = response.json()
+                if token_result and token_result.get('code') == 200:
+                    page_token = json_loads(token_result['body']).get('access_token')
+                    if page_token:
+                        logger.info("Retrieved page access token")
+                        self._page_token_cache = (page_token, time.time())
+                
+                if ig_result and ig_result.get('code') == 200:
+                    data = json_loads(ig_result['body'])
+                    logger.info(f"Instagram access verified: @{data.get('username', 'Unknown')}")
+                    self._instagram_access = {
+                        'success': True,
+                        'username': data.get('username'),
+                        'media_count': data.get('media_count')
+                    }
+                    return dict(self._instagram_access)
+            
+            logger.warning("Batched Instagram verification failed, retrying with individual requests")
+        
+        except Exception as e:
+            logger.warning(f"Error in batched Instagram verification: {e}")
+        
+        # Fall back to the individual call, which also produces detailed error messages
+        return self._verify_instagram_access()
+    
     def _verify_instagram_access(self) -> Dict[str, Any]:
         """Verify that we can access the Instagram business account."""
+        if self._instagram_access is not None:
+            return dict(self._instagram_access)
         try:
             response = self.session.get(
                 f"{self.base_url}/{self.instagram_business_account_id}",
-                params={'fields': 'id,username,media_count'}
+                params={'fields': 'id,username,media_count'},
+                headers=self._auth_headers
             )
             
             if response.status_code == 200:
                 data = response.json()
                 logger.info(f"Instagram access verified: @{data.get('username', 'Unknown')}")
-                return {
+                self._instagram_access = {
                     'success': True,
                     'username': data.get('username'),
                     'media_count': data.get('media_count')
                 }
+                return dict(self._instagram_access)
             else:
                 error_msg = f"Instagram access failed: {response.status_code} - {response.text}"
                 logger.error(f"{error_msg}")
@@ -513,7 +1039,7 @@ class AutonomousSocialMediaPoster:
                 # Try to get the image URL from the existing Facebook post
                 page_access_token = self._get_page_access_token()
                 if page_access_token:
-                    post_response = requests.get(
+                    post_response = self.session.get(
                         f"{self.base_url}/{facebook_post_id}",
                         params={
                             'fields': 'images,picture',
@@ -546,17 +1072,21 @@ class AutonomousSocialMediaPoster:
                     }
                 
                 with open(image_path, 'rb') as image_file:
-                    files = {'source': image_file}
+                    source = _HashingReader(image_file)
+                    files = {'source': (os.path.basename(image_path), source)}
                     data = {
-                        'access_token': page_access_token,
                         'published': 'false'  # Don't create a post, just upload the image
                     }
                     
-                    upload_response = requests.post(
+                    # Ask for the image URLs in the upload response itself
+                    upload_response = self.session.post(
                         f"{self.base_url}/{self.page_id}/photos",
+                        params={'fields': 'images,picture'},
                         files=files,
-                        data=data
+                        data=data,
+                        headers=self._page_auth_headers(page_access_token)
                     )
+                    self._remember_upload_hash(image_path, image_file, source)
                 
                 if upload_response.status_code != 200:
                     error_msg = f"Failed to upload image for Instagram: {upload_response.status_code} - {upload_response.text}"
@@ -581,11 +1111,11 @@ class AutonomousSocialMediaPoster:
                 if not image_url and 'picture' in upload_result:
                     image_url = upload_result['picture']
                 
-                # Method 3: Try to get the URL from the post ID
+                # Method 3: Fetch the URL by photo ID, only if the upload response lacked it
                 if not image_url and 'id' in upload_result:
                     # Get the post details to extract image URL
                     post_id = upload_result['id']
-                    post_response = requests.get(
+                    post_response = self.session.get(
                         f"{self.base_url}/{post_id}",
                         params={
                             'fields': 'images,picture',
@@ -620,7 +1150,7 @@ class AutonomousSocialMediaPoster:
                 'access_token': self.access_token
             }
             
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/{self.instagram_business_account_id}/media",
                 data=media_data
             )
@@ -638,7 +1168,7 @@ class AutonomousSocialMediaPoster:
                         'access_token': self.access_token
                     }
                     
-                    publish_response = requests.post(
+                    publish_response = self.session.post(
                         f"{self.base_url}/{self.instagram_business_account_id}/media_publish",
                         data=publish_data
                     )
@@ -694,47 +1224,72 @@ class AutonomousSocialMediaPoster:
     
     def _respect_rate_limits(self):
         """Ensure we don't exceed platform rate limits."""
-        current_time = time.time()
-        time_since_last_post = current_time - self.last_post_time
-        
-        if time_since_last_post < self.min_post_interval:
-            sleep_time = self.min_post_interval - time_since_last_post
-            logger.info(f"Rate limiting: waiting {sleep_time:.1f} seconds")
-            time.sleep(sleep_time)
+        # Platforms posted to in parallel wait out the same interval together
+        with self._rate_limit_lock:
+            current_time = time.time()
+            time_since_last_post = current_time - self.last_post_time
+            
+            if time_since_last_post < self.min_post_interval:
+                sleep_time = self.min_post_interval - time_since_last_post
+                logger.info(f"Rate limiting: waiting {sleep_time:.1f} seconds")
+                time.sleep(sleep_time)
+    
+    def _migrate_posting_log(self, posting_log_path: str):
+        """Convert a legacy posting_log.json array to JSONL, once."""
+        if self._posting_log_migrated:
+            return
+        legacy_path = os.path.join(DATA_DIRECTORY, LEGACY_POSTING_LOG_FILENAME)
+        if not os.path.exists(legacy_path):
+            self._posting_log_migrated = True
+            return
+        # Rotation moves the JSONL log away, so its absence doesn't mean the legacy log is
+        # unmigrated; only the legacy file itself, renamed once copied, records that.
+        # Both present means a migration got as far as the copy, so only the rename is left
+        if not os.path.exists(posting_log_path):
+            self._copy_legacy_posting_log(legacy_path, posting_log_path)
+        os.replace(legacy_path, f"{legacy_path}.migrated")
+        self._posting_log_migrated = True
+    
+    def _copy_legacy_posting_log(self, legacy_path: str, posting_log_path: str):
+        """Write the entries of a legacy JSON-array log to a new JSONL log."""
+        with open(legacy_path, 'r', encoding='utf-8') as f:
+            posting_log = json_loads(f.read())
+        # A partial file would look migrated and stop the migration from ever rerunning,
+        # so the JSONL log only appears once it is complete
+        tmp = tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=DATA_DIRECTORY, delete=False)
+        try:
+            with tmp:
+                tmp.writelines(json_dumps(entry) + '\n' for entry in posting_log)
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            os.replace(tmp.name, posting_log_path)
+        except BaseException:
+            os.unlink(tmp.name)
+            raise
+        logger.info(f"Migrated {len(posting_log)} posting log entries to {posting_log_path}")
     
     def _log_posting_results(self, post_data: Dict[str, Any], results: Dict[str, Any]):
-        """Log posting results to posting_log.json."""
+        """Append posting results to posting_log.jsonl."""
         try:
-            posting_log_path = os.path.join(DATA_DIRECTORY, 'posting_log.json')
-            
-            # Ensure directory exists
-            os.makedirs(DATA_DIRECTORY, exist_ok=True)
-            
-            # Load existing log
-            try:
-                with open(posting_log_path, 'r') as f:
-                    posting_log = json.load(f)
-            except FileNotFoundError:
-                posting_log = []
+            # Entries are pure appends; the old log is only read if it still needs migrating
+            self._migrate_posting_log(self._posting_log_path)
             
             # Add new entry
             log_entry = {
-                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                # ISO-8601 to the second, formatted in C rather than through strftime
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
                 'post_id': post_data.get('id', 'unknown'),
-                'content': post_data.get('full_post', post_data.get('content', '')),
+                'content': _truncate_for_log(post_data.get('full_post', post_data.get('content', '')), _LOG_CONTENT_MAX_CHARS),
                 'type': post_data.get('type', 'unknown'),
                 'has_image': post_data.get('has_image', False),
                 'image_filename': post_data.get('image_filename'),
-                'posting_results': results
+                'posting_results': _results_for_log(results)
             }
             
-            posting_log.append(log_entry)
-            
-            # Save updated log
-            with open(posting_log_path, 'w') as f:
-                json.dump(posting_log, f, indent=2)
+            # Appended in the background, batched with any other entries queued meanwhile
+            _posting_log_writer(self._posting_log_path).submit(log_entry)
             
-            logger.info(f"Posting results logged: {results.get('overall_success', False)}")
+            logger.info(f"Posting results queued for logging: {results.get('overall_success', False)}")
             
         except Exception as e:
             logger.error(f"Error logging posting results: {e}") 
\ No newline at end of file